@@ -0,0 +1,56 @@
+import { useState, useEffect } from 'react';
+import { Autocomplete, TextField } from '@mui/material';
+import { suggestItems } from '../services/api';
+
+const SUGGEST_DEBOUNCE_MS = 200;
+
+// Item description field that suggests previously invoiced items and their last price
+export default function ItemNameAutocomplete({ value, onChange, onSelectSuggestion }) {
+    const [options, setOptions] = useState([]);
+
+    useEffect(() => {
+        if (!value.trim()) {
+            setOptions([]);
+            return;
+        }
+        // Wait for a pause in typing rather than hitting the server on every keystroke
+        let cancelled = false;
+        const timer = setTimeout(() => {
+            suggestItems(value)
+                .then((res) => { if (!cancelled) setOptions(res.data); })
+                .catch((err) => console.error("Failed to fetch item suggestions:", err));
+        }, SUGGEST_DEBOUNCE_MS);
+        return () => {
+            cancelled = true;
+            clearTimeout(timer);
+        };
+    }, [value]);
+
+    return (
+        <Autocomplete
+            freeSolo
+            options={options}
+            filterOptions={(x) => x}
+            getOptionLabel={(option) => (typeof option === 'string' ? option : option.itemName)}
+            renderOption={(props, option) => (
+                <li {...props} key={option.itemName}>
+                    {option.itemName} — ${option.lastPrice.toFixed(2)}
+                </li>
+            )}
+            inputValue={value}
+            onInputChange={(e, newValue) => onChange(newValue)}
+            onChange={(e, option) => {
+                if (option && typeof option !== 'string') onSelectSuggestion(option);
+            }}
+            renderInput={(params) => (
+                <TextField
+                    {...params}
+                    fullWidth
+                    required
+                    label="Item Description"
+                    placeholder="e.g., Web Development Services"
+                />
+            )}
+        />
+    );
+}
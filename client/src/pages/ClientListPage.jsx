@@ -16,7 +16,7 @@ import {
   Avatar,
 } from "@mui/material";
 import { DataGrid } from "@mui/x-data-grid";
-import { getClients, createClient, updateClient, deleteClient, importClients } from "../services/api";
+import { getClients, createClient, updateClient, deleteClient, importClients, subscribeToChanges } from "../services/api";
 import {
   PersonAdd as PersonAddIcon,
   UploadFile as UploadFileIcon,
@@ -70,8 +70,32 @@ export default function ClientListPage() {
     }
   };
 
+  // Applies a server-pushed change to the list instead of re-fetching it
+  const applyChange = ({ type, data }) => {
+    const byName = (a, b) => a.name.localeCompare(b.name);
+    switch (type) {
+      case "client.created":
+        setClients((prev) =>
+          prev.some((c) => c.id === data.id) ? prev : [...prev, data].sort(byName)
+        );
+        break;
+      case "client.updated":
+        setClients((prev) => prev.map((c) => (c.id === data.id ? data : c)).sort(byName));
+        break;
+      case "client.deleted":
+        setClients((prev) => prev.filter((c) => c.id !== data.id));
+        break;
+      case "clients.imported":
+        fetchClients();
+        break;
+      default:
+        break;
+    }
+  };
+
   useEffect(() => {
     fetchClients();
+    return subscribeToChanges(applyChange, fetchClients);
   }, []);
 
   useEffect(() => {
@@ -136,7 +160,6 @@ export default function ClientListPage() {
         message = 'Client created successfully!';
       }
       handleCloseModal();
-      fetchClients();
       setSnackbar({ open: true, message, severity: 'success' });
     } catch (error) {
       setFormError("Operation failed. The email might already be in use.");
@@ -152,10 +175,10 @@ export default function ClientListPage() {
         try {
             await deleteClient(clientId);
             setSnackbar({ open: true, message: 'Client deleted successfully.', severity: 'success' });
-            fetchClients();
         } catch(error) {
             setSnackbar({ open: true, message: 'Failed to delete client.', severity: 'error' });
             console.error(error);
+        } finally {
             setLoading(false);
         }
     }
@@ -174,7 +197,6 @@ export default function ClientListPage() {
     try {
         const response = await importClients(formData);
         setSnackbar({ open: true, message: response.data.message, severity: 'success' });
-        fetchClients();
     } catch (err) {
         const errorData = err.response?.data;
         const message = errorData?.detail?.message || 'An error occurred during import.';
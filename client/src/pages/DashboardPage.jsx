@@ -9,7 +9,7 @@ import {
   Alert,
   Paper,
 } from "@mui/material";
-import { getDashboardMetrics } from "../services/api";
+import { getDashboardMetrics, subscribeToChanges } from "../services/api";
 import {
   BarChart,
   Bar,
@@ -65,6 +65,39 @@ export default function DashboardPage() {
       }
     };
     fetchMetrics();
+
+    // Keep the cards current from the change feed instead of polling
+    const applyChange = ({ type, data }) => {
+      if (type === "client.deleted") {
+        fetchMetrics();
+        return;
+      }
+      if (type !== "invoice.created" && type !== "invoice.updated") return;
+
+      const previous = type === "invoice.created" ? null : data.previousStatus;
+      const wasPaid = previous === "PAID";
+      const isPaid = data.status === "PAID";
+      const overdueDelta = (data.status === "OVERDUE") - (previous === "OVERDUE");
+
+      setMetrics((prev) => {
+        if (!prev) return prev;
+        const next = { ...prev, overdueCount: prev.overdueCount + overdueDelta };
+        if (type === "invoice.created") {
+          next.totalInvoices += 1;
+          if (!isPaid) next.totalOutstanding += data.total;
+          else next.totalRevenue += data.total;
+        } else if (!wasPaid && isPaid) {
+          next.totalRevenue += data.total;
+          next.totalOutstanding -= data.total;
+        } else if (wasPaid && !isPaid) {
+          next.totalRevenue -= data.total;
+          next.totalOutstanding += data.total;
+        }
+        return next;
+      });
+    };
+
+    return subscribeToChanges(applyChange, fetchMetrics);
   }, []);
 
   if (loading) {
@@ -28,6 +28,7 @@ import {
   Calculate as CalculateIcon,
 } from "@mui/icons-material"
 import { getClients, createInvoice } from "../services/api"
+import ItemNameAutocomplete from "../components/ItemNameAutocomplete"
 
 export default function InvoiceCreatePage() {
   const [clients, setClients] = useState([])
@@ -67,6 +68,20 @@ export default function InvoiceCreatePage() {
     setItems(values)
   }
 
+  const handleItemNameChange = (index, itemName) => {
+    const values = [...items]
+    values[index].itemName = itemName
+    setItems(values)
+  }
+
+  // Picking a suggestion also fills in the price it was last billed at
+  const handleSelectSuggestion = (index, suggestion) => {
+    const values = [...items]
+    values[index].itemName = suggestion.itemName
+    values[index].unitPrice = suggestion.lastPrice
+    setItems(values)
+  }
+
   const handleAddItem = () => {
     setItems([...items, { itemName: "", quantity: 1, unitPrice: 0.0 }])
   }
@@ -241,14 +256,10 @@ export default function InvoiceCreatePage() {
                     <Card variant="outlined" sx={{ p: 2 }}>
                       <Grid container spacing={2} alignItems="center">
                         <Grid item xs={12} sm={5}>
-                          <TextField
-                            fullWidth
-                            required
-                            label="Item Description"
-                            name="itemName"
+                          <ItemNameAutocomplete
                             value={item.itemName}
-                            onChange={(e) => handleItemChange(index, e)}
-                            placeholder="e.g., Web Development Services"
+                            onChange={(itemName) => handleItemNameChange(index, itemName)}
+                            onSelectSuggestion={(suggestion) => handleSelectSuggestion(index, suggestion)}
                           />
                         </Grid>
                         <Grid item xs={4} sm={2}>
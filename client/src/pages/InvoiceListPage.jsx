@@ -18,7 +18,7 @@ import {
   Link,
 } from "@mui/material";
 import { DataGrid } from "@mui/x-data-grid";
-import { getInvoices, updateInvoiceStatus } from "../services/api";
+import { getInvoices, updateInvoiceStatus, subscribeToChanges, buildApiUrl } from "../services/api";
 import { Link as RouterLink } from "react-router-dom";
 import {
   AddCircleOutline as AddCircleOutlineIcon,
@@ -61,8 +61,42 @@ export default function InvoiceListPage() {
     }
   };
 
+  // Applies a server-pushed change to the list instead of re-fetching it
+  const applyChange = ({ type, data }) => {
+    switch (type) {
+      case "invoice.created":
+        setInvoices((prev) =>
+          prev.some((inv) => inv.id === data.id)
+            ? prev
+            : [data, ...prev].sort((a, b) => new Date(b.issueDate) - new Date(a.issueDate))
+        );
+        break;
+      case "invoice.updated":
+        setInvoices((prev) =>
+          prev.map((inv) => (inv.id === data.id ? { ...inv, status: data.status } : inv))
+        );
+        break;
+      case "client.updated":
+        setInvoices((prev) =>
+          prev.map((inv) =>
+            inv.clientId === data.id ? { ...inv, client: { ...inv.client, name: data.name } } : inv
+          )
+        );
+        break;
+      case "client.deleted":
+        setInvoices((prev) => prev.filter((inv) => inv.clientId !== data.id));
+        break;
+      case "invoices.archived":
+        fetchInvoices();
+        break;
+      default:
+        break;
+    }
+  };
+
   useEffect(() => {
     fetchInvoices();
+    return subscribeToChanges(applyChange, fetchInvoices);
   }, []);
 
   useEffect(() => {
@@ -85,7 +119,6 @@ export default function InvoiceListPage() {
   const handleMarkAsPaid = async (id) => {
     try {
       await updateInvoiceStatus(id, "PAID");
-      fetchInvoices();
     } catch (err) {
       console.error("Failed to mark as paid:", err);
     }
@@ -94,7 +127,7 @@ export default function InvoiceListPage() {
   const handleDownloadPdf = (invoiceId) => {
     // We open the URL in a new tab. The browser handles the download.
     window.open(
-      `http://localhost:8000/api/invoices/${invoiceId}/pdf`,
+      buildApiUrl(`/invoices/${invoiceId}/pdf`),
       "_blank"
     );
   };
@@ -253,7 +286,7 @@ export default function InvoiceListPage() {
         <Button
             variant="outlined"
             startIcon={<DownloadIcon />}
-            href="http://localhost:8000/api/export/invoices/csv"
+            href={buildApiUrl("/export/invoices/csv")}
             target="_blank" // Opens in a new tab to trigger download
         >
             Export CSV
@@ -4,9 +4,19 @@ const apiClient = axios.create({
     baseURL: 'http://localhost:8000/api',
     headers: {
         'Content-Type': 'application/json',
+        // Only needed when the server runs in multi-tenant mode
+        ...(import.meta.env.VITE_TENANT_ID && { 'X-Tenant-ID': import.meta.env.VITE_TENANT_ID }),
     },
 });
 
+// Absolute URL for links the browser opens directly (downloads, EventSource), which
+// cannot carry the X-Tenant-ID header, so the tenant goes in the query string instead
+export const buildApiUrl = (path) => {
+    const tenant = import.meta.env.VITE_TENANT_ID;
+    const url = `${apiClient.defaults.baseURL}${path}`;
+    return tenant ? `${url}${url.includes('?') ? '&' : '?'}tenant=${encodeURIComponent(tenant)}` : url;
+};
+
 // --- Invoice Functions ---
 export const getInvoices = () => {
     return apiClient.get('/invoices');
@@ -37,6 +47,10 @@ export const recordPayment = (invoiceId, paymentData) => {
     return apiClient.post(`/invoices/${invoiceId}/payments`, paymentData);
 };
 
+export const suggestItems = (query) => {
+    return apiClient.get('/items/suggest', { params: { q: query } });
+};
+
 export const getInvoiceDetails = (invoiceId) => {
     return apiClient.get(`/invoices/${invoiceId}`);
 };
@@ -62,4 +76,14 @@ export const updateClient = (clientId, clientData) => {
 
 export const deleteClient = (clientId) => {
     return apiClient.delete(`/clients/${clientId}`);
-};
\ No newline at end of file
+};
+
+// --- Change Feed ---
+// Subscribes to server-pushed change events. EventSource reconnects on its own and
+// resumes from the last event id, so pages only reload fully when told to reset.
+export const subscribeToChanges = (onChange, onReset) => {
+    const source = new EventSource(buildApiUrl('/events'));
+    source.addEventListener('change', (e) => onChange(JSON.parse(e.data)));
+    source.addEventListener('reset', () => onReset());
+    return () => source.close();
+};
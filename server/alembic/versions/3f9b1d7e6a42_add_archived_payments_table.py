@@ -0,0 +1,70 @@
+"""Add archived_payments table
+
+Revision ID: 3f9b1d7e6a42
+Revises: e7a2c5f8b913
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+import json
+import zlib
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9b1d7e6a42'
+down_revision: Union[str, Sequence[str], None] = 'e7a2c5f8b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    archived_payments = op.create_table(
+        'archived_payments',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('invoiceId', sa.String(), nullable=False),
+        sa.Column('clientId', sa.String(), nullable=False),
+        sa.Column('invoiceNumber', sa.String(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('paymentDate', sa.DateTime(), nullable=False),
+        sa.Column('method', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_payments_invoiceId'), 'archived_payments', ['invoiceId'], unique=False)
+    op.create_index(op.f('ix_archived_payments_clientId'), 'archived_payments', ['clientId'], unique=False)
+
+    # Payments already archived only exist inside the compressed invoice payloads
+    archived_invoices = sa.table(
+        'archived_invoices',
+        sa.column('id', sa.String()),
+        sa.column('clientId', sa.String()),
+        sa.column('invoiceNumber', sa.String()),
+        sa.column('payload', sa.LargeBinary()),
+    )
+    bind = op.get_bind()
+    rows = []
+    for invoice in bind.execute(sa.select(archived_invoices)):
+        data = json.loads(zlib.decompress(invoice.payload).decode('utf-8'))
+        for payment in data['payments']:
+            rows.append({
+                'id': payment['id'],
+                'invoiceId': invoice.id,
+                'clientId': invoice.clientId,
+                'invoiceNumber': invoice.invoiceNumber,
+                'amount': payment['amount'],
+                'paymentDate': datetime.fromisoformat(payment['paymentDate']),
+                'method': payment['method'],
+            })
+    if rows:
+        op.bulk_insert(archived_payments, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_archived_payments_clientId'), table_name='archived_payments')
+    op.drop_index(op.f('ix_archived_payments_invoiceId'), table_name='archived_payments')
+    op.drop_table('archived_payments')
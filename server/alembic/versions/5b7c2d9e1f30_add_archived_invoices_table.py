@@ -0,0 +1,42 @@
+"""Add archived_invoices table
+
+Revision ID: 5b7c2d9e1f30
+Revises: 4066e1e45ff2
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7c2d9e1f30'
+down_revision: Union[str, Sequence[str], None] = '4066e1e45ff2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'archived_invoices',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('invoiceNumber', sa.String(), nullable=False),
+        sa.Column('clientId', sa.String(), nullable=False),
+        sa.Column('issueDate', sa.DateTime(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('archivedAt', sa.DateTime(), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_invoices_invoiceNumber'), 'archived_invoices', ['invoiceNumber'], unique=True)
+    op.create_index(op.f('ix_archived_invoices_clientId'), 'archived_invoices', ['clientId'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_archived_invoices_clientId'), table_name='archived_invoices')
+    op.drop_index(op.f('ix_archived_invoices_invoiceNumber'), table_name='archived_invoices')
+    op.drop_table('archived_invoices')
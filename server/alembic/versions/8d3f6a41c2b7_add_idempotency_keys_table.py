@@ -0,0 +1,39 @@
+"""Add idempotency_keys table
+
+Revision ID: 8d3f6a41c2b7
+Revises: 5b7c2d9e1f30
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f6a41c2b7'
+down_revision: Union[str, Sequence[str], None] = '5b7c2d9e1f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('fingerprint', sa.String(), nullable=False),
+        sa.Column('statusCode', sa.Integer(), nullable=True),
+        sa.Column('mediaType', sa.String(), nullable=True),
+        sa.Column('responseBody', sa.LargeBinary(), nullable=True),
+        sa.Column('createdAt', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_idempotency_keys_createdAt'), 'idempotency_keys', ['createdAt'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_idempotency_keys_createdAt'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
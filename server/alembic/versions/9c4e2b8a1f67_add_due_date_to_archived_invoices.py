@@ -0,0 +1,54 @@
+"""Add dueDate to archived_invoices
+
+Revision ID: 9c4e2b8a1f67
+Revises: 3f9b1d7e6a42
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+import json
+import zlib
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e2b8a1f67'
+down_revision: Union[str, Sequence[str], None] = '3f9b1d7e6a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('archived_invoices', sa.Column('dueDate', sa.DateTime(), nullable=True))
+
+    # The due date of invoices archived so far is only inside their payload
+    archived_invoices = sa.table(
+        'archived_invoices',
+        sa.column('id', sa.String()),
+        sa.column('dueDate', sa.DateTime()),
+        sa.column('payload', sa.LargeBinary()),
+    )
+    bind = op.get_bind()
+    due_dates = [
+        (row.id, json.loads(zlib.decompress(row.payload).decode('utf-8'))['dueDate'])
+        for row in bind.execute(sa.select(archived_invoices.c.id, archived_invoices.c.payload))
+    ]
+    for invoice_id, due_date in due_dates:
+        bind.execute(
+            archived_invoices.update()
+            .where(archived_invoices.c.id == invoice_id)
+            .values(dueDate=datetime.fromisoformat(due_date))
+        )
+
+    with op.batch_alter_table('archived_invoices') as batch_op:
+        batch_op.alter_column('dueDate', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('archived_invoices') as batch_op:
+        batch_op.drop_column('dueDate')
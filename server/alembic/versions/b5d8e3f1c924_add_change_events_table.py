@@ -0,0 +1,38 @@
+"""Add change_events table
+
+Revision ID: b5d8e3f1c924
+Revises: 9c4e2b8a1f67
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d8e3f1c924'
+down_revision: Union[str, Sequence[str], None] = '9c4e2b8a1f67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'change_events',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('createdAt', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+    )
+    op.create_index(op.f('ix_change_events_createdAt'), 'change_events', ['createdAt'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_change_events_createdAt'), table_name='change_events')
+    op.drop_table('change_events')
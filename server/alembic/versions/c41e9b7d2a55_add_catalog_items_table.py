@@ -0,0 +1,62 @@
+"""Add catalog_items table
+
+Revision ID: c41e9b7d2a55
+Revises: 8d3f6a41c2b7
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e9b7d2a55'
+down_revision: Union[str, Sequence[str], None] = '8d3f6a41c2b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    catalog_items = op.create_table(
+        'catalog_items',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('itemName', sa.String(), nullable=False),
+        sa.Column('usageCount', sa.Integer(), nullable=False),
+        sa.Column('lastPrice', sa.Float(), nullable=False),
+        sa.Column('lastUsedAt', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+    # Seed the catalog from historical line items, oldest first so the latest name and price win
+    invoice_items = sa.table(
+        'invoice_items',
+        sa.column('itemName', sa.String()),
+        sa.column('unitPrice', sa.Float()),
+        sa.column('invoiceId', sa.String()),
+    )
+    invoices = sa.table('invoices', sa.column('id', sa.String()), sa.column('issueDate', sa.DateTime()))
+    history = op.get_bind().execute(
+        sa.select(invoice_items.c.itemName, invoice_items.c.unitPrice, invoices.c.issueDate)
+        .join(invoices, invoice_items.c.invoiceId == invoices.c.id)
+        .order_by(invoices.c.issueDate)
+    )
+    rows = {}
+    for item_name, unit_price, issue_date in history:
+        key = " ".join(item_name.lower().split())
+        if not key:
+            continue
+        row = rows.setdefault(key, {'key': key, 'usageCount': 0})
+        row['usageCount'] += 1
+        row['itemName'] = " ".join(item_name.split())
+        row['lastPrice'] = unit_price
+        row['lastUsedAt'] = issue_date
+    if rows:
+        op.bulk_insert(catalog_items, list(rows.values()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('catalog_items')
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", "./ai_cache.json")
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "500"))
+AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", "86400"))
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def make_key(tenant_id, question: str, data_version: int) -> str:
+    """Answers depend on the question, the data and today's date (for overdue checks)."""
+    raw = json.dumps([tenant_id, normalize_question(question), data_version, date.today().isoformat()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """LRU of AI answers with a TTL, persisted to a JSON file so it survives restarts.
+
+    Entries for an older data version are never hit again and simply age out.
+    """
+
+    def __init__(self, path: str = AI_CACHE_PATH, max_size: int = AI_CACHE_SIZE, ttl: int = AI_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, expires_at, answer in stored[-self.max_size:]:
+            if expires_at > now:
+                self._entries[key] = (expires_at, answer)
+
+    def _save(self):
+        # Written to a temp file first so a crash never leaves a half-written cache behind.
+        # The temp file is unique per write, so workers sharing the cache file never collide.
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=os.path.dirname(os.path.abspath(self.path)),
+                prefix=".ai_cache-", suffix=".tmp", delete=False
+            ) as f:
+                tmp_path = f.name
+                json.dump([[key, expires_at, answer] for key, (expires_at, answer) in self._entries.items()], f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not persist AI answer cache - {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, answer: str):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+answers = AnswerCache()
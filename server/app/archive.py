@@ -0,0 +1,231 @@
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import event, func, literal, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from . import models
+from .audit_utils import log_activity
+
+# Settled invoices older than this many days are moved out of the hot tables
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = 200
+
+
+def _dt(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _parse_dt(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _serialize_invoice(invoice: models.Invoice, audit_logs) -> bytes:
+    """Packs an invoice and everything hanging off it into a compressed JSON blob."""
+    data = {
+        "id": invoice.id,
+        "invoiceNumber": invoice.invoiceNumber,
+        "issueDate": _dt(invoice.issueDate),
+        "dueDate": _dt(invoice.dueDate),
+        "status": invoice.status.value,
+        "total": invoice.total,
+        "client": {
+            "id": invoice.client.id,
+            "name": invoice.client.name,
+            "email": invoice.client.email,
+            "address": invoice.client.address,
+        },
+        "items": [
+            {"id": item.id, "itemName": item.itemName, "quantity": item.quantity, "unitPrice": item.unitPrice}
+            for item in invoice.items
+        ],
+        "payments": [
+            {"id": p.id, "amount": p.amount, "paymentDate": _dt(p.paymentDate), "method": p.method}
+            for p in invoice.payments
+        ],
+        "auditLogs": [
+            {
+                "id": log.id,
+                "timestamp": _dt(log.timestamp),
+                "entity_type": log.entity_type,
+                "action": log.action,
+                "details": log.details,
+            }
+            for log in audit_logs
+        ],
+    }
+    return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 9)
+
+
+def _archived_payment_rows(invoice_id: str, client_id: str, invoice_number: str, payments) -> list:
+    return [
+        {
+            "id": p["id"],
+            "invoiceId": invoice_id,
+            "clientId": client_id,
+            "invoiceNumber": invoice_number,
+            "amount": p["amount"],
+            "paymentDate": _parse_dt(p["paymentDate"]),
+            "method": p["method"],
+        }
+        for p in payments
+    ]
+
+
+@event.listens_for(models.ArchivedPayment.__table__, "after_create")
+def _backfill_archived_payments(target, connection, **kw):
+    # Databases archived before this table existed only have payments inside the payloads.
+    # create_all makes archived_invoices first (tables are created in name order), so it exists here.
+    archived = models.ArchivedInvoice.__table__
+    result = connection.execution_options(yield_per=ARCHIVE_BATCH_SIZE).execute(
+        select(archived.c.id, archived.c.clientId, archived.c.invoiceNumber, archived.c.payload)
+    )
+    for batch in result.partitions():
+        rows = []
+        for row in batch:
+            data = json.loads(zlib.decompress(row.payload).decode("utf-8"))
+            rows.extend(_archived_payment_rows(row.id, row.clientId, row.invoiceNumber, data["payments"]))
+        if rows:
+            connection.execute(target.insert(), rows)
+
+
+def archive_settled_invoices(db: Session, older_than_days: int = ARCHIVE_AFTER_DAYS) -> int:
+    """Moves PAID invoices issued before the cutoff into `archived_invoices`, in batches.
+
+    Returns the number of invoices archived.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+
+    while True:
+        batch = db.query(models.Invoice).options(
+            joinedload(models.Invoice.client),
+            selectinload(models.Invoice.items),
+            selectinload(models.Invoice.payments)
+        ).filter(
+            models.Invoice.status == models.InvoiceStatusEnum.PAID,
+            models.Invoice.issueDate < cutoff
+        ).order_by(models.Invoice.issueDate).limit(ARCHIVE_BATCH_SIZE).all()
+
+        if not batch:
+            break
+
+        invoice_ids = [inv.id for inv in batch]
+        logs_by_invoice = {}
+        for log in db.query(models.AuditLog).filter(models.AuditLog.entity_id.in_(invoice_ids)):
+            logs_by_invoice.setdefault(log.entity_id, []).append(log)
+
+        db.add_all([
+            models.ArchivedInvoice(
+                id=inv.id,
+                invoiceNumber=inv.invoiceNumber,
+                clientId=inv.clientId,
+                issueDate=inv.issueDate,
+                dueDate=inv.dueDate,
+                total=inv.total,
+                payload=_serialize_invoice(inv, logs_by_invoice.get(inv.id, [])),
+            )
+            for inv in batch
+        ])
+        db.bulk_insert_mappings(models.ArchivedPayment, [
+            {
+                "id": p.id,
+                "invoiceId": inv.id,
+                "clientId": inv.clientId,
+                "invoiceNumber": inv.invoiceNumber,
+                "amount": p.amount,
+                "paymentDate": p.paymentDate,
+                "method": p.method,
+            }
+            for inv in batch
+            for p in inv.payments
+        ])
+
+        # Bulk deletes keep this from loading the rows a second time through the ORM cascade
+        db.query(models.AuditLog).filter(models.AuditLog.entity_id.in_(invoice_ids)).delete(synchronize_session=False)
+        db.query(models.Payment).filter(models.Payment.invoiceId.in_(invoice_ids)).delete(synchronize_session=False)
+        db.query(models.InvoiceItem).filter(models.InvoiceItem.invoiceId.in_(invoice_ids)).delete(synchronize_session=False)
+        db.query(models.Invoice).filter(models.Invoice.id.in_(invoice_ids)).delete(synchronize_session=False)
+        db.commit()
+        db.expunge_all()
+
+        archived += len(batch)
+
+    if archived:
+        log_activity(db, 'Invoice', 'Multiple', 'ARCHIVE', f"Archived {archived} settled invoices older than {older_than_days} days.")
+        db.commit()
+
+    return archived
+
+
+def delete_client_archive(db: Session, client_id: str):
+    """Removes a client's archived invoices and payments, inside the caller's transaction."""
+    db.query(models.ArchivedPayment).filter(
+        models.ArchivedPayment.clientId == client_id
+    ).delete(synchronize_session=False)
+    db.query(models.ArchivedInvoice).filter(
+        models.ArchivedInvoice.clientId == client_id
+    ).delete(synchronize_session=False)
+
+
+def load_archived_invoice(db: Session, invoice_id: str) -> Optional[models.Invoice]:
+    """Rebuilds an archived invoice as a detached, read-only `models.Invoice`.
+
+    The returned object is never added to the session, so it can be handed to the
+    same response models and PDF code as a live invoice.
+    """
+    row = db.query(models.ArchivedInvoice.payload).filter(models.ArchivedInvoice.id == invoice_id).first()
+    if not row:
+        return None
+
+    data = json.loads(zlib.decompress(row.payload).decode("utf-8"))
+    client = models.Client(**data["client"])
+    return models.Invoice(
+        id=data["id"],
+        invoiceNumber=data["invoiceNumber"],
+        issueDate=_parse_dt(data["issueDate"]),
+        dueDate=_parse_dt(data["dueDate"]),
+        status=models.InvoiceStatusEnum(data["status"]),
+        total=data["total"],
+        clientId=client.id,
+        client=client,
+        items=[models.InvoiceItem(**item) for item in data["items"]],
+        payments=[
+            models.Payment(**{**p, "paymentDate": _parse_dt(p["paymentDate"])})
+            for p in data["payments"]
+        ],
+    )
+
+
+def archived_export_rows(db: Session):
+    """(invoiceNumber, client name, status, issueDate, dueDate, total) of every archived invoice.
+
+    Read from the manifest alone; archived invoices are settled, so they are always PAID.
+    """
+    return db.query(
+        models.ArchivedInvoice.invoiceNumber,
+        models.Client.name,
+        literal(models.InvoiceStatusEnum.PAID.value),
+        models.ArchivedInvoice.issueDate,
+        models.ArchivedInvoice.dueDate,
+        models.ArchivedInvoice.total,
+    ).join(models.Client, models.Client.id == models.ArchivedInvoice.clientId).all()
+
+
+def iter_archived_invoices(db: Session):
+    """Yields every archived invoice as its unpacked payload dict, reading in batches."""
+    rows = db.query(models.ArchivedInvoice.payload).yield_per(ARCHIVE_BATCH_SIZE)
+    for row in rows:
+        yield json.loads(zlib.decompress(row.payload).decode("utf-8"))
+
+
+def archived_totals(db: Session):
+    """Returns (count, revenue) of archived invoices, for metrics and numbering."""
+    count, revenue = db.query(
+        func.count(models.ArchivedInvoice.id),
+        func.coalesce(func.sum(models.ArchivedInvoice.total), 0.0)
+    ).one()
+    return count, revenue
@@ -0,0 +1,281 @@
+import bisect
+import heapq
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import case, event, inspect, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Reload from the table after this long to pick up writes made by other workers
+INDEX_TTL_SECONDS = 300
+MAX_SUGGESTIONS = 25
+# Prefixes matching more keys than this keep their top suggestions cached instead of being ranked per lookup
+SCAN_LIMIT = 256
+# Tenants whose index is kept in memory; the least recently used are dropped beyond this
+MAX_INDEXES = int(os.getenv("MAX_CATALOG_INDEXES", "256"))
+
+
+def normalize(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def _prefix_end(prefix: str):
+    """The smallest string above every string starting with `prefix`, or None if there is none."""
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    return stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+
+class PrefixIndex:
+    """Catalog entries kept in a sorted array so a prefix range is two bisects.
+
+    Short prefixes match a large share of the catalog, so ranking their range on every
+    keystroke would be slow; prefixes matching more than SCAN_LIMIT keys keep their top
+    suggestions cached, and upserts keep those caches exact.
+    """
+
+    def __init__(self, rows, top_size: int = MAX_SUGGESTIONS):
+        self.entries = {row.key: (row.itemName, row.usageCount, row.lastPrice) for row in rows}
+        self.keys = sorted(self.entries)
+        self.top_size = top_size
+        self.loaded_at = time.monotonic()
+        self._top = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def _rank(self, key: str):
+        return (-self.entries[key][1], key)
+
+    def suggest(self, prefix: str, limit: int):
+        top = self._top.get(prefix)
+        if top is None:
+            version = self._version
+            lo = bisect.bisect_left(self.keys, prefix)
+            end = _prefix_end(prefix)
+            hi = bisect.bisect_left(self.keys, end) if end is not None else len(self.keys)
+            matches = (self.keys[i] for i in range(lo, hi))
+            if hi - lo <= SCAN_LIMIT:
+                return [self.entries[key] for key in heapq.nsmallest(limit, matches, key=self._rank)]
+            top = heapq.nsmallest(self.top_size, matches, key=self._rank)
+            with self._lock:
+                # Only cached if no upsert ran during the scan, so the cache never misses one
+                if self._version == version:
+                    self._top[prefix] = top
+        return [self.entries[key] for key in top[:limit]]
+
+    def upsert(self, key: str, item_name: str, usage_count: int, last_price: float):
+        existing = self.entries.get(key)
+        if existing is not None and existing[1] > usage_count:
+            # Usage only grows, so this row was read before the one already indexed
+            return
+        # The entry goes in before its key so concurrent lookups never see a key without one
+        self.entries[key] = (item_name, usage_count, last_price)
+        if existing is None:
+            bisect.insort(self.keys, key)
+
+        with self._lock:
+            self._version += 1
+            for i in range(1, len(key) + 1):
+                top = self._top.get(key[:i])
+                if top is None:
+                    continue
+                if key in top or len(top) < self.top_size or self._rank(key) < self._rank(top[-1]):
+                    self._top[key[:i]] = sorted(set(top) | {key}, key=self._rank)[:self.top_size]
+
+
+class _TenantIndex:
+    def __init__(self):
+        self.index = None
+        # Held while the index is rebuilt from the table, so only one request reloads it
+        self.load_lock = threading.Lock()
+        # Guards swapping the index in and applying refreshed rows to it
+        self.lock = threading.Lock()
+        # Rows refreshed while a reload is running, replayed onto the new index before the swap
+        self.pending = None
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def _tenant_index(tenant_id, create: bool = True):
+    with _lock:
+        slot = _indexes.get(tenant_id)
+        if slot is not None:
+            _indexes.move_to_end(tenant_id)
+        elif create:
+            slot = _indexes[tenant_id] = _TenantIndex()
+            if len(_indexes) > MAX_INDEXES:
+                _indexes.popitem(last=False)
+        return slot
+
+
+def _upsert_statement(db: Session, rows):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        insert = sqlite_insert
+    elif dialect == "postgresql":
+        insert = postgresql_insert
+    else:
+        return None
+
+    table = models.CatalogItem.__table__
+    stmt = insert(table).values(rows)
+    newer = stmt.excluded.lastUsedAt >= table.c.lastUsedAt
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.key],
+        set_={
+            "usageCount": table.c.usageCount + stmt.excluded.usageCount,
+            "itemName": case((newer, stmt.excluded.itemName), else_=table.c.itemName),
+            "lastPrice": case((newer, stmt.excluded.lastPrice), else_=table.c.lastPrice),
+            "lastUsedAt": case((newer, stmt.excluded.lastUsedAt), else_=table.c.lastUsedAt),
+        }
+    )
+
+
+def record_items(db: Session, invoice: models.Invoice):
+    """Folds an invoice's line items into the catalog, inside the caller's transaction.
+
+    Returns the catalog keys that changed, to pass to `refresh_index` after commit.
+    """
+    rows = {}
+    for item in invoice.items:
+        key = normalize(item.itemName)
+        if not key:
+            continue
+        row = rows.setdefault(key, {"key": key, "usageCount": 0, "lastUsedAt": invoice.issueDate})
+        row["usageCount"] += 1
+        row["itemName"] = " ".join(item.itemName.split())
+        row["lastPrice"] = item.unitPrice
+
+    if not rows:
+        return []
+
+    stmt = _upsert_statement(db, list(rows.values()))
+    if stmt is not None:
+        db.execute(stmt)
+    else:
+        for row in rows.values():
+            existing = db.get(models.CatalogItem, row["key"])
+            if existing is None:
+                db.add(models.CatalogItem(**row))
+                continue
+            existing.usageCount += row["usageCount"]
+            if row["lastUsedAt"] >= existing.lastUsedAt:
+                existing.itemName = row["itemName"]
+                existing.lastPrice = row["lastPrice"]
+                existing.lastUsedAt = row["lastUsedAt"]
+    return list(rows)
+
+
+@event.listens_for(models.CatalogItem.__table__, "after_create")
+def _backfill(target, connection, **kw):
+    """Builds the catalog from historical invoice items when the table is first created.
+
+    Runs in the same DDL transaction, so no invoice can be recorded before the history is in.
+    On a brand new database the invoice tables don't exist yet and there is nothing to backfill.
+    """
+    schema = connection.get_execution_options().get("schema_translate_map", {}).get(None)
+    if not inspect(connection).has_table(models.InvoiceItem.__tablename__, schema=schema):
+        return
+
+    items, invoices = models.InvoiceItem.__table__, models.Invoice.__table__
+    history = connection.execution_options(yield_per=5000).execute(
+        select(items.c.itemName, items.c.unitPrice, invoices.c.issueDate)
+        .join(invoices, items.c.invoiceId == invoices.c.id)
+        .order_by(invoices.c.issueDate)
+    )
+    rows = {}
+    for item_name, unit_price, issue_date in history:
+        key = normalize(item_name)
+        if not key:
+            continue
+        row = rows.setdefault(key, {"key": key, "usageCount": 0})
+        row["usageCount"] += 1
+        row["itemName"] = " ".join(item_name.split())
+        row["lastPrice"] = unit_price
+        row["lastUsedAt"] = issue_date
+
+    if rows:
+        connection.execute(target.insert(), list(rows.values()))
+
+
+def _load_index(db: Session) -> PrefixIndex:
+    rows = db.query(
+        models.CatalogItem.key, models.CatalogItem.itemName,
+        models.CatalogItem.usageCount, models.CatalogItem.lastPrice
+    ).yield_per(5000)
+    return PrefixIndex(rows)
+
+
+def get_index(db: Session, tenant_id=None) -> PrefixIndex:
+    slot = _tenant_index(tenant_id)
+    index = slot.index
+    if index is not None and time.monotonic() - index.loaded_at <= INDEX_TTL_SECONDS:
+        return index
+
+    if index is not None:
+        if not slot.load_lock.acquire(blocking=False):
+            # Another request is already reloading it; the stale index is good enough meanwhile
+            return index
+    else:
+        slot.load_lock.acquire()
+
+    try:
+        if slot.index is not index:
+            # Loaded by another request while we waited for the lock
+            return slot.index
+        with slot.lock:
+            slot.pending = []
+        # Built with only this tenant's load lock held, so lookups and refreshes carry on
+        try:
+            new_index = _load_index(db)
+        except Exception:
+            with slot.lock:
+                slot.pending = None
+            raise
+        with slot.lock:
+            for row in slot.pending:
+                new_index.upsert(row.key, row.itemName, row.usageCount, row.lastPrice)
+            slot.pending = None
+            slot.index = new_index
+        return new_index
+    finally:
+        slot.load_lock.release()
+
+
+def refresh_index(db: Session, tenant_id, keys):
+    """Copies freshly written catalog rows into the in-memory index, if it is loaded."""
+    slot = _tenant_index(tenant_id, create=False)
+    if slot is None or not keys:
+        return
+
+    rows = db.query(
+        models.CatalogItem.key, models.CatalogItem.itemName,
+        models.CatalogItem.usageCount, models.CatalogItem.lastPrice
+    ).filter(models.CatalogItem.key.in_(keys)).all()
+    with slot.lock:
+        if slot.pending is not None:
+            slot.pending.extend(rows)
+        if slot.index is not None:
+            for row in rows:
+                slot.index.upsert(row.key, row.itemName, row.usageCount, row.lastPrice)
+
+
+def suggest(db: Session, query: str, limit: int = 10, tenant_id=None):
+    prefix = normalize(query)
+    if not prefix:
+        return []
+    limit = max(1, min(limit, MAX_SUGGESTIONS))
+    return [
+        {"itemName": item_name, "usageCount": usage_count, "lastPrice": last_price}
+        for item_name, usage_count, last_price in get_index(db, tenant_id).suggest(prefix, limit)
+    ]
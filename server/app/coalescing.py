@@ -0,0 +1,113 @@
+import asyncio
+import os
+
+import anyio
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+# Seconds a queued request waits for a free slot before it is turned away
+QUEUE_TIMEOUT = float(os.getenv("EXPENSIVE_QUEUE_TIMEOUT", "10"))
+RETRY_AFTER_SECONDS = 2
+
+
+def _reject():
+    raise HTTPException(
+        status_code=429,
+        detail="Server is busy, please retry shortly.",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.followers = 0
+
+
+class SingleFlight:
+    """Runs at most one computation per key; concurrent callers with the same key share its result.
+
+    Everything here runs on the event loop, so waiting callers hold no worker thread.
+    At most `max_followers` callers may wait on a computation; the rest get a 429.
+    """
+
+    def __init__(self, max_followers: int):
+        self.max_followers = max_followers
+        self._calls = {}
+
+    async def do(self, key, fn):
+        loop = asyncio.get_running_loop()
+        call = self._calls.get(key)
+        if call is not None and call.task.get_loop() is loop:
+            if call.followers >= self.max_followers:
+                _reject()
+            call.followers += 1
+        else:
+            # The computation is its own task, so a disconnecting leader doesn't cancel it for the followers
+            call = self._calls[key] = _Call(loop.create_task(fn()))
+            call.task.add_done_callback(lambda task: self._finish(key, task))
+        return await asyncio.shield(call.task)
+
+    def _finish(self, key, task):
+        call = self._calls.get(key)
+        if call is not None and call.task is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Marks the error as retrieved even if every caller has gone away
+            task.exception()
+
+
+class ConcurrencyLimiter:
+    """Caps how many computations run at once, with a bounded queue behind them.
+
+    Requests that find the queue full, or wait longer than the timeout,
+    get a 429 with a Retry-After header instead of piling up on the DB pool.
+    Only the computation itself runs in the threadpool; queued requests just await a slot.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, timeout: float = QUEUE_TIMEOUT):
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots = anyio.Semaphore(max_concurrent)
+        self._waiting = 0
+
+    async def run(self, fn):
+        try:
+            self._slots.acquire_nowait()
+        except anyio.WouldBlock:
+            if self._waiting >= self.max_queue:
+                _reject()
+            self._waiting += 1
+            try:
+                with anyio.move_on_after(self.timeout) as scope:
+                    await self._slots.acquire()
+            finally:
+                self._waiting -= 1
+            if scope.cancelled_caught:
+                _reject()
+
+        try:
+            return await run_in_threadpool(fn)
+        finally:
+            self._slots.release()
+
+
+class ExpensiveEndpoint:
+    """Singleflight in front of a concurrency limiter.
+
+    Only the leader of each key takes a slot, so a burst of identical requests
+    costs one computation, one slot and one thread.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, max_followers: int):
+        self._flight = SingleFlight(max_followers)
+        self._limiter = ConcurrencyLimiter(max_concurrent, max_queue)
+
+    async def run(self, key, fn):
+        return await self._flight.do(key, lambda: self._limiter.run(fn))
+
+
+metrics = ExpensiveEndpoint(max_concurrent=4, max_queue=16, max_followers=64)
+export = ExpensiveEndpoint(max_concurrent=2, max_queue=8, max_followers=16)
+pdf = ExpensiveEndpoint(max_concurrent=4, max_queue=16, max_followers=16)
+ai_query = ExpensiveEndpoint(max_concurrent=2, max_queue=4, max_followers=16)
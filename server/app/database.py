@@ -1,4 +1,9 @@
-from sqlalchemy import create_engine
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -13,4 +18,102 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+# Tables that only live in the default database (the tenant registry), never in a tenant shard
+ControlBase = declarative_base()
+
+# --- Multi-tenant mode ---
+# With MULTI_TENANT=1 every request names its tenant and gets a session on that tenant's shard.
+# If TENANT_DATABASE_URL contains "{tenant}" each tenant gets its own database
+# (e.g. "sqlite:///./tenants/{tenant}.db"), otherwise each tenant gets its own
+# schema inside that one database (e.g. "postgresql://user:pw@host/invoices").
+# Tenants must be provisioned first (`python -m app.tenants create <id> <name>`); unknown ids get a 404.
+MULTI_TENANT = os.getenv("MULTI_TENANT", "0").lower() in ("1", "true", "yes")
+TENANT_DATABASE_URL = os.getenv("TENANT_DATABASE_URL", "sqlite:///./tenants/{tenant}.db")
+TENANT_POOL_SIZE = int(os.getenv("TENANT_POOL_SIZE", "2"))
+MAX_OPEN_SHARDS = int(os.getenv("MAX_OPEN_SHARDS", "256"))
+
+TENANT_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+
+class ShardRouter:
+    """Maps tenant ids to their own engine and sessionmaker.
+
+    Shards are opened lazily and kept in an LRU so that a deployment with thousands
+    of small tenants only holds pools for the ones that are actually active.
+    """
+
+    def __init__(self, url_template: str, max_open: int = MAX_OPEN_SHARDS, pool_size: int = TENANT_POOL_SIZE):
+        self.url_template = url_template
+        self.max_open = max_open
+        self.pool_size = pool_size
+        self._shards = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def _create_engine(self, tenant_id: str):
+        if "{tenant}" in self.url_template:
+            url = self.url_template.format(tenant=tenant_id)
+            if url.startswith("sqlite"):
+                db_path = url.split("///", 1)[-1]
+                if os.path.dirname(db_path):
+                    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                return create_engine(url, connect_args={"check_same_thread": False})
+            return create_engine(url, pool_size=self.pool_size, max_overflow=self.pool_size)
+
+        # Schema-per-tenant: unqualified tables resolve to the tenant's schema
+        shard_engine = create_engine(
+            self.url_template, pool_size=self.pool_size, max_overflow=self.pool_size
+        ).execution_options(schema_translate_map={None: tenant_id})
+        with shard_engine.begin() as conn:
+            conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{tenant_id}"'))
+        return shard_engine
+
+    def get_sessionmaker(self, tenant_id: str) -> sessionmaker:
+        with self._lock:
+            shard = self._shards.get(tenant_id)
+            if shard is not None:
+                self._shards.move_to_end(tenant_id)
+                return shard
+            build_lock = self._building.setdefault(tenant_id, threading.Lock())
+
+        # Opening a new shard (engine, schema, tables) only holds this tenant's lock,
+        # so requests for tenants that are already open never wait behind the DDL
+        with build_lock:
+            with self._lock:
+                shard = self._shards.get(tenant_id)
+                if shard is not None:
+                    self._shards.move_to_end(tenant_id)
+                    return shard
+
+            shard_engine = self._create_engine(tenant_id)
+            Base.metadata.create_all(bind=shard_engine)
+            shard = sessionmaker(autocommit=False, autoflush=False, bind=shard_engine)
+
+            evicted = None
+            with self._lock:
+                self._shards[tenant_id] = shard
+                self._building.pop(tenant_id, None)
+                if len(self._shards) > self.max_open:
+                    _, evicted = self._shards.popitem(last=False)
+
+        if evicted is not None:
+            evicted.kw["bind"].dispose()
+        return shard
+
+
+shard_router = ShardRouter(TENANT_DATABASE_URL) if MULTI_TENANT else None
+
+
+def normalize_tenant_id(raw: str):
+    """Returns the canonical tenant id, or None if it is not a valid slug."""
+    tenant_id = (raw or "").strip().lower()
+    return tenant_id if TENANT_ID_PATTERN.match(tenant_id) else None
+
+
+def get_session(tenant_id: str = None):
+    """Returns a new session for the tenant's shard, or the default database in single-tenant mode."""
+    if shard_router is None:
+        return SessionLocal()
+    return shard_router.get_sessionmaker(tenant_id)()
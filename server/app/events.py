@@ -0,0 +1,243 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+
+from . import database, models
+
+# Events stay in the change_events table this long, for clients resuming with Last-Event-ID
+EVENT_RETENTION_SECONDS = int(os.getenv("EVENT_RETENTION_SECONDS", "3600"))
+# How often each worker looks for events published by the other workers
+EVENT_POLL_SECONDS = float(os.getenv("EVENT_POLL_SECONDS", "0.5"))
+# An id still missing after this long belongs to a rolled-back insert, not a slow commit
+EVENT_GAP_SECONDS = 2.0
+EVENT_BATCH_SIZE = 500
+SUBSCRIBER_QUEUE_SIZE = 1000
+HEARTBEAT_SECONDS = 15
+PRUNE_EVERY = 100
+
+_RESET = object()
+
+
+def display_status(invoice: models.Invoice) -> str:
+    """The status as the invoice list shows it, with past-due UNPAID invoices reported as OVERDUE."""
+    if invoice.status == models.InvoiceStatusEnum.UNPAID and invoice.dueDate < datetime.utcnow():
+        return models.InvoiceStatusEnum.OVERDUE.value
+    return invoice.status.value
+
+
+def invoice_row(invoice: models.Invoice) -> dict:
+    """Compact invoice delta shaped like a row of the invoice list."""
+    return {
+        "id": invoice.id,
+        "invoiceNumber": invoice.invoiceNumber,
+        "clientId": invoice.clientId,
+        "client": {"name": invoice.client.name},
+        "status": display_status(invoice),
+        "total": invoice.total,
+        "issueDate": invoice.issueDate.isoformat(),
+        "dueDate": invoice.dueDate.isoformat(),
+    }
+
+
+def _deliver(queue: asyncio.Queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # The subscriber fell too far behind; drop its backlog and tell it to reload
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(_RESET)
+
+
+def _fetch(tenant_id, after_id: int, limit: int = EVENT_BATCH_SIZE) -> list:
+    db = database.get_session(tenant_id)
+    try:
+        rows = db.query(models.ChangeEvent.id, models.ChangeEvent.type, models.ChangeEvent.data).filter(
+            models.ChangeEvent.id > after_id
+        ).order_by(models.ChangeEvent.id).limit(limit).all()
+        return [{"seq": row.id, "type": row.type, "data": json.loads(row.data)} for row in rows]
+    finally:
+        db.close()
+
+
+def _id_range(tenant_id):
+    """(oldest, newest) event id still in the table, both 0 when it is empty."""
+    db = database.get_session(tenant_id)
+    try:
+        oldest, newest = db.query(func.min(models.ChangeEvent.id), func.max(models.ChangeEvent.id)).one()
+        return oldest or 0, newest or 0
+    finally:
+        db.close()
+
+
+class _TenantFeed:
+    """Polls one tenant's change_events table and fans new rows out to this process's subscribers."""
+
+    def __init__(self):
+        self.last_id = None
+        self.subscribers = set()
+        self.wake = asyncio.Event()
+
+    async def run(self, tenant_id):
+        gap_since = None
+        while self.subscribers:
+            self.wake.clear()
+            try:
+                if self.last_id is None:
+                    self.last_id = (await run_in_threadpool(_id_range, tenant_id))[1]
+                events = await run_in_threadpool(_fetch, tenant_id, self.last_id)
+            except Exception as e:
+                print(f"Warning: Could not read change events - {e}")
+                events = []
+
+            for event in events:
+                if event["seq"] != self.last_id + 1:
+                    # An earlier id may belong to a transaction that hasn't committed yet
+                    gap_since = gap_since or time.monotonic()
+                    if time.monotonic() - gap_since < EVENT_GAP_SECONDS:
+                        break
+                gap_since = None
+                self.last_id = event["seq"]
+                for queue in list(self.subscribers):
+                    _deliver(queue, event)
+
+            if len(events) == EVENT_BATCH_SIZE and gap_since is None:
+                continue
+            try:
+                await asyncio.wait_for(self.wake.wait(), EVENT_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+class ChangeBus:
+    """Change events from the mutating routes, fanned out to the SSE subscribers of every worker.
+
+    publish() appends to the tenant's change_events table, whose id is the SSE event id.
+    Each worker polls that table for the tenants it has subscribers for, so a change made
+    through one worker reaches browsers connected to any other, and a reconnecting client
+    resumes from its Last-Event-ID even across restarts.
+    """
+
+    def __init__(self):
+        self._feeds = {}
+        self._lock = threading.Lock()
+        self._published = 0
+
+    def publish(self, tenant_id, event_type: str, data: dict):
+        # The change itself is already committed, so a failure here is logged, not raised
+        db = database.get_session(tenant_id)
+        try:
+            db.add(models.ChangeEvent(type=event_type, data=json.dumps(data)))
+            db.commit()
+            with self._lock:
+                self._published += 1
+                prune = self._published % PRUNE_EVERY == 0
+            if prune:
+                cutoff = datetime.utcnow() - timedelta(seconds=EVENT_RETENTION_SECONDS)
+                db.query(models.ChangeEvent).filter(models.ChangeEvent.createdAt < cutoff).delete(synchronize_session=False)
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: Could not publish {event_type} event - {e}")
+            return
+        finally:
+            db.close()
+
+        # Subscribers in this process hear about it right away; other workers on their next poll
+        with self._lock:
+            feeds = [(loop, feed) for (loop, feed_tenant), feed in self._feeds.items() if feed_tenant == tenant_id]
+        for loop, feed in feeds:
+            try:
+                loop.call_soon_threadsafe(feed.wake.set)
+            except RuntimeError:
+                # The loop has been closed
+                pass
+
+    def _subscribe(self, tenant_id, queue: asyncio.Queue) -> _TenantFeed:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            feed = self._feeds.get((loop, tenant_id))
+            if feed is None:
+                feed = self._feeds[(loop, tenant_id)] = _TenantFeed()
+                loop.create_task(self._run(loop, tenant_id, feed))
+            feed.subscribers.add(queue)
+        return feed
+
+    async def _run(self, loop, tenant_id, feed: _TenantFeed):
+        try:
+            await feed.run(tenant_id)
+        finally:
+            with self._lock:
+                if self._feeds.get((loop, tenant_id)) is feed:
+                    del self._feeds[(loop, tenant_id)]
+
+    def _unsubscribe(self, feed: _TenantFeed, queue: asyncio.Queue):
+        with self._lock:
+            feed.subscribers.discard(queue)
+        # Lets the poller notice it has nobody left to serve
+        feed.wake.set()
+
+    async def _backlog(self, tenant_id, last_event_id: str):
+        """Events after `last_event_id`, or None when the client must reload its state instead."""
+        if not last_event_id.isdigit():
+            return None
+        last_seq = int(last_event_id)
+        oldest, newest = await run_in_threadpool(_id_range, tenant_id)
+        if last_seq > newest or (oldest and last_seq < oldest - 1):
+            # Unknown position, or some of the events the client missed have been pruned
+            return None
+        backlog = await run_in_threadpool(_fetch, tenant_id, last_seq, SUBSCRIBER_QUEUE_SIZE + 1)
+        return backlog if len(backlog) <= SUBSCRIBER_QUEUE_SIZE else None
+
+    def format(self, event) -> str:
+        return f"id: {event['seq']}\nevent: change\ndata: {json.dumps(event)}\n\n"
+
+    def format_reset(self, seq: int) -> str:
+        return f"id: {seq}\nevent: reset\ndata: {{}}\n\n"
+
+    async def stream(self, request, tenant_id, last_event_id: str = None):
+        """Yields Server-Sent Events until the client disconnects."""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Subscribed before reading the backlog so nothing published in between is missed
+        feed = self._subscribe(tenant_id, queue)
+        last_seq = 0
+        try:
+            yield "retry: 3000\n\n"
+            if last_event_id:
+                backlog = await self._backlog(tenant_id, last_event_id)
+                if backlog is None:
+                    last_seq = (await run_in_threadpool(_id_range, tenant_id))[1]
+                    yield self.format_reset(last_seq)
+                    backlog = []
+                for event in backlog:
+                    last_seq = event["seq"]
+                    yield self.format(event)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event is _RESET:
+                    yield self.format_reset(feed.last_id or last_seq)
+                    continue
+                # Events already sent from the backlog can arrive again through the feed
+                if event["seq"] <= last_seq:
+                    continue
+                last_seq = event["seq"]
+                yield self.format(event)
+        finally:
+            self._unsubscribe(feed, queue)
+
+
+bus = ChangeBus()
@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import anyio
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from . import database, models, tenants
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")) * 3600
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1024"))
+# A claim that hasn't been renewed for this long is assumed abandoned (e.g. a crashed worker).
+# The owner renews it every third of the lease for as long as the request runs.
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+MAX_KEY_LENGTH = 255
+
+# Write endpoints that honour the Idempotency-Key header
+IDEMPOTENT_ROUTES = [
+    re.compile(r"^/api/invoices$"),
+    re.compile(r"^/api/invoices/[^/]+/payments$"),
+    re.compile(r"^/api/import/clients/csv$"),
+]
+
+
+class ResponseCache:
+    """Bounded LRU of completed responses with a TTL, shared by the whole process."""
+
+    def __init__(self, max_size: int = IDEMPOTENCY_CACHE_SIZE, ttl: int = IDEMPOTENCY_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache()
+
+
+def _multipart_boundary(request: Request):
+    content_type = request.headers.get("content-type", "")
+    if not content_type.lower().startswith("multipart/"):
+        return None
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary" and value:
+            return value.strip('"').encode("latin-1")
+    return None
+
+
+def _fingerprint(request: Request, body: bytes) -> str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.url.path.encode())
+    # Clients pick a fresh multipart boundary on every send, so a retried upload
+    # is only recognisable once the boundary is taken out of the body
+    boundary = _multipart_boundary(request)
+    if boundary:
+        body = body.replace(boundary, b"")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _claim(tenant_id, key: str, fingerprint: str):
+    """Claims the key in the database.
+
+    Returns None if this request now owns the key, otherwise the existing row's
+    (fingerprint, statusCode, mediaType, responseBody).
+    """
+    db = database.get_session(tenant_id)
+    try:
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+        existing = db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).first()
+        if existing and existing.createdAt < cutoff:
+            db.delete(existing)
+            db.commit()
+            existing = None
+
+        if existing and existing.statusCode is None and existing.createdAt < now - timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS):
+            # The previous owner never completed or released the key; take it over.
+            # Matching on createdAt makes sure only one retry wins the stale claim.
+            taken = db.query(models.IdempotencyKey).filter(
+                models.IdempotencyKey.key == key,
+                models.IdempotencyKey.statusCode.is_(None),
+                models.IdempotencyKey.createdAt == existing.createdAt
+            ).update({"fingerprint": fingerprint, "createdAt": now}, synchronize_session=False)
+            db.commit()
+            if taken:
+                return None
+            return (fingerprint, None, None, None)
+
+        if existing:
+            return (existing.fingerprint, existing.statusCode, existing.mediaType, existing.responseBody)
+
+        db.add(models.IdempotencyKey(key=key, fingerprint=fingerprint))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker claimed the same key between our read and insert
+            db.rollback()
+            return (fingerprint, None, None, None)
+        return None
+    finally:
+        db.close()
+
+
+def _complete(tenant_id, key: str, status_code: int, media_type: str, body: bytes):
+    db = database.get_session(tenant_id)
+    try:
+        db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).update({
+            "statusCode": status_code,
+            "mediaType": media_type,
+            "responseBody": body,
+        })
+        # Expired keys are purged opportunistically so the table stays bounded by the TTL
+        cutoff = datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+        db.query(models.IdempotencyKey).filter(models.IdempotencyKey.createdAt < cutoff).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _renew(tenant_id, key: str):
+    db = database.get_session(tenant_id)
+    try:
+        db.query(models.IdempotencyKey).filter(
+            models.IdempotencyKey.key == key,
+            models.IdempotencyKey.statusCode.is_(None)
+        ).update({"createdAt": datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _keep_claim(tenant_id, key: str):
+    while True:
+        await asyncio.sleep(IDEMPOTENCY_LEASE_SECONDS / 3)
+        try:
+            await run_in_threadpool(_renew, tenant_id, key)
+        except Exception as e:
+            print(f"Warning: Could not renew idempotency claim - {e}")
+
+
+def _release(tenant_id, key: str):
+    db = database.get_session(tenant_id)
+    try:
+        db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _replay(status_code: int, media_type: str, body: bytes) -> Response:
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type=media_type,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+async def idempotency_middleware(request: Request, call_next):
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if (
+        not key
+        or request.method != "POST"
+        or not any(route.match(request.url.path) for route in IDEMPOTENT_ROUTES)
+    ):
+        return await call_next(request)
+
+    if len(key) > MAX_KEY_LENGTH:
+        return JSONResponse(status_code=400, content={"detail": f"{IDEMPOTENCY_HEADER} is too long."})
+
+    tenant_id = None
+    if database.MULTI_TENANT:
+        tenant_id = database.normalize_tenant_id(request.headers.get("X-Tenant-ID") or request.query_params.get("tenant"))
+        if not tenant_id or not await run_in_threadpool(tenants.is_registered, tenant_id):
+            # Let the route's own tenant resolution reject the request
+            return await call_next(request)
+
+    body = await request.body()
+    fingerprint = _fingerprint(request, body)
+    cache_key = (tenant_id, key)
+
+    cached = response_cache.get(cache_key)
+    if cached is None:
+        cached = await run_in_threadpool(_claim, tenant_id, key, fingerprint)
+        if cached is not None and cached[1] is not None:
+            response_cache.put(cache_key, cached)
+
+    if cached is not None:
+        stored_fingerprint, status_code, media_type, stored_body = cached
+        if stored_fingerprint != fingerprint:
+            return JSONResponse(
+                status_code=422,
+                content={"detail": f"{IDEMPOTENCY_HEADER} was already used with a different request."}
+            )
+        if status_code is None:
+            return JSONResponse(
+                status_code=409,
+                content={"detail": "A request with this Idempotency-Key is still being processed."}
+            )
+        return _replay(status_code, media_type, stored_body)
+
+    completed = False
+    # A slow request (e.g. a large CSV import) keeps its claim alive so a retry sees 409, not a stale lease
+    heartbeat = asyncio.ensure_future(_keep_claim(tenant_id, key))
+    try:
+        response = await call_next(request)
+
+        # Server errors are not stored so that the client can retry them
+        if response.status_code >= 500:
+            return response
+
+        response_body = b"".join([chunk async for chunk in response.body_iterator])
+        media_type = response.headers.get("content-type")
+        await run_in_threadpool(_complete, tenant_id, key, response.status_code, media_type, response_body)
+        completed = True
+    finally:
+        heartbeat.cancel()
+        if not completed:
+            # Also runs on cancellation (client disconnect, shutdown), so the retry isn't stuck on 409
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(_release, tenant_id, key)
+
+    response_cache.put(cache_key, (fingerprint, response.status_code, media_type, response_body))
+
+    return Response(
+        content=response_body,
+        status_code=response.status_code,
+        headers={k: v for k, v in response.headers.items() if k.lower() != "content-length"},
+    )
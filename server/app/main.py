@@ -1,6 +1,6 @@
-from fastapi import FastAPI, Depends, HTTPException, File, UploadFile
+from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload, load_only
 from typing import List, Optional
 from datetime import datetime
 import json
@@ -9,6 +9,7 @@ from pydantic import BaseModel, ValidationError
 import os
 from sqlalchemy import func
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import io
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
@@ -17,15 +18,25 @@ from pathlib import Path
 from dotenv import load_dotenv
 import csv
 
-from . import models, schemas, database
+from . import models, schemas, database, archive, statements, coalescing, catalog, versioning, ai_cache, tenants
+from .events import bus, display_status, invoice_row
+from .idempotency import idempotency_middleware
 from .audit_utils import log_activity
 env_path = Path('.') / '.env'
 load_dotenv(dotenv_path=env_path)
 
-models.Base.metadata.create_all(bind=database.engine)
+# In multi-tenant mode each shard creates its own tables when first opened,
+# and the default database only holds the tenant registry
+if not database.MULTI_TENANT:
+    models.Base.metadata.create_all(bind=database.engine)
+else:
+    tenants.ensure_registry()
 
 app = FastAPI(title="Invoicing API")
 
+# Registered before CORS so that replayed responses still get CORS headers
+app.middleware("http")(idempotency_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -48,23 +59,49 @@ except Exception as e:
     print(f"Warning: Could not initialize OpenAI client - {e}. AI features will be disabled.")
     client = None
     
-def get_db():
-    db = database.SessionLocal()
+def get_tenant(x_tenant_id: Optional[str] = Header(None), tenant: Optional[str] = None) -> Optional[str]:
+    # Single-tenant deployments ignore the header and keep using the default database.
+    # Links the browser opens directly (PDF, CSV, EventSource) can't set headers, so they pass ?tenant=
+    if not database.MULTI_TENANT:
+        return None
+    raw_tenant = x_tenant_id or tenant
+    if not raw_tenant:
+        raise HTTPException(status_code=400, detail="X-Tenant-ID header is required.")
+    tenant_id = database.normalize_tenant_id(raw_tenant)
+    if not tenant_id:
+        raise HTTPException(status_code=400, detail="Invalid tenant id.")
+    # Only provisioned tenants get a shard, so a typo can't silently open an empty company
+    if not tenants.is_registered(tenant_id):
+        raise HTTPException(status_code=404, detail="Unknown tenant.")
+    return tenant_id
+
+def get_db(tenant_id: Optional[str] = Depends(get_tenant)):
+    db = database.get_session(tenant_id)
     try:
         yield db
     finally:
         db.close()
 
+def run_in_session(tenant_id: Optional[str], fn, *args):
+    # For coalesced endpoints: only the computation that actually runs opens a session,
+    # so requests waiting on it hold neither a connection nor a worker thread
+    db = database.get_session(tenant_id)
+    try:
+        return fn(*args, db)
+    finally:
+        db.close()
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Invoicing API"}
 
 @app.post("/api/clients", response_model=schemas.Client, status_code=201)
-def create_client(client: schemas.ClientCreate, db: Session = Depends(get_db)):
+def create_client(client: schemas.ClientCreate, tenant_id: Optional[str] = Depends(get_tenant), db: Session = Depends(get_db)):
     db_client = models.Client(**client.model_dump())
     db.add(db_client)
     db.commit()
     db.refresh(db_client)
+    bus.publish(tenant_id, "client.created", schemas.Client.model_validate(db_client).model_dump(mode="json"))
     return db_client
 
 @app.get("/api/clients", response_model=List[schemas.Client])
@@ -72,16 +109,19 @@ def get_clients(db: Session = Depends(get_db)):
     return db.query(models.Client).order_by(models.Client.name).all()
 
 @app.delete("/api/clients/{client_id}", status_code=204)
-def delete_client(client_id: str, db: Session = Depends(get_db)):
+def delete_client(client_id: str, tenant_id: Optional[str] = Depends(get_tenant), db: Session = Depends(get_db)):
     client = db.query(models.Client).filter(models.Client.id == client_id).first()
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
+    # Archived invoices are not covered by the ORM cascade
+    archive.delete_client_archive(db, client_id)
     db.delete(client)
     db.commit()
+    bus.publish(tenant_id, "client.deleted", {"id": client_id})
     return
 
 @app.put("/api/clients/{client_id}", response_model=schemas.Client)
-def update_client(client_id: str, client_data: schemas.ClientCreate, db: Session = Depends(get_db)):
+def update_client(client_id: str, client_data: schemas.ClientCreate, tenant_id: Optional[str] = Depends(get_tenant), db: Session = Depends(get_db)):
     db_client = db.query(models.Client).filter(models.Client.id == client_id).first()
     if not db_client:
         raise HTTPException(status_code=404, detail="Client not found")
@@ -95,16 +135,48 @@ def update_client(client_id: str, client_data: schemas.ClientCreate, db: Session
     
     db.commit()
     db.refresh(db_client)
+    bus.publish(tenant_id, "client.updated", schemas.Client.model_validate(db_client).model_dump(mode="json"))
     return db_client
 
+@app.get("/api/clients/{client_id}/statement")
+def get_client_statement(
+    client_id: str,
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: str = "jsonl",
+    db: Session = Depends(get_db)
+):
+    # `start` doubles as the opening-balance cutoff: everything before it is rolled up into one line.
+    # Both bounds are inclusive.
+    end = statements.inclusive_end(request.query_params.get("end"), end)
+    client = db.query(models.Client).filter(models.Client.id == client_id).first()
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must be before end.")
+
+    if format == "jsonl":
+        return StreamingResponse(
+            statements.stream_statement_jsonl(db, client, start, end),
+            media_type='application/x-ndjson'
+        )
+    if format == "pdf":
+        buffer = statements.build_statement_pdf(db, client, start, end)
+        headers = {'Content-Disposition': f'inline; filename="statement_{client.id}.pdf"'}
+        return StreamingResponse(buffer, headers=headers, media_type='application/pdf')
+    raise HTTPException(status_code=400, detail="format must be 'jsonl' or 'pdf'.")
+
 @app.post("/api/invoices", response_model=schemas.InvoiceDetails, status_code=201)
-def create_invoice(invoice: schemas.InvoiceCreate, db: Session = Depends(get_db)):
+def create_invoice(invoice: schemas.InvoiceCreate, tenant_id: Optional[str] = Depends(get_tenant), db: Session = Depends(get_db)):
     client = db.query(models.Client).filter(models.Client.id == invoice.clientId).first()
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
     total = sum(item.quantity * item.unitPrice for item in invoice.items)
-    last_invoice_count = db.query(models.Invoice).count()
+    # Archived invoices still hold their numbers, so count them too
+    archived_count, _ = archive.archived_totals(db)
+    last_invoice_count = db.query(models.Invoice).count() + archived_count
     invoice_number = f"INV-{last_invoice_count + 1001}"
 
     db_invoice = models.Invoice(
@@ -117,10 +189,17 @@ def create_invoice(invoice: schemas.InvoiceCreate, db: Session = Depends(get_db)
     )
     
     db.add(db_invoice)
+    catalog_keys = catalog.record_items(db, db_invoice)
     db.commit()
     db.refresh(db_invoice)
+    catalog.refresh_index(db, tenant_id, catalog_keys)
+    bus.publish(tenant_id, "invoice.created", invoice_row(db_invoice))
     return db_invoice
 
+@app.get("/api/items/suggest", response_model=List[schemas.ItemSuggestion])
+def suggest_items(q: str = "", limit: int = 10, tenant_id: Optional[str] = Depends(get_tenant), db: Session = Depends(get_db)):
+    return catalog.suggest(db, q, limit, tenant_id)
+
 @app.get("/api/invoices", response_model=List[schemas.Invoice])
 def get_invoices(status: Optional[models.InvoiceStatusEnum] = None, db: Session = Depends(get_db)):
     query = db.query(models.Invoice).options(joinedload(models.Invoice.client))
@@ -137,21 +216,27 @@ def get_invoices(status: Optional[models.InvoiceStatusEnum] = None, db: Session
     return invoices
 
 @app.put("/api/invoices/{invoice_id}/status", response_model=schemas.Invoice)
-def update_invoice_status(invoice_id: str, status_update: schemas.InvoiceStatusUpdate, db: Session = Depends(get_db)):
+def update_invoice_status(invoice_id: str, status_update: schemas.InvoiceStatusUpdate, tenant_id: Optional[str] = Depends(get_tenant), db: Session = Depends(get_db)):
     db_invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
     if not db_invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
+    previous_status = display_status(db_invoice)
     db_invoice.status = status_update.status
     db.commit()
     db.refresh(db_invoice)
+    bus.publish(tenant_id, "invoice.updated", {
+        "id": db_invoice.id,
+        "status": display_status(db_invoice),
+        "previousStatus": previous_status,
+        "total": db_invoice.total,
+    })
     return db_invoice
 
 class AIQueryRequest(BaseModel):
     query: str
 
-@app.get("/api/metrics", response_model=schemas.DashboardMetrics)
-def get_dashboard_metrics(db: Session = Depends(get_db)):
+def compute_dashboard_metrics(db: Session):
     # Calculate Total Revenue (from PAID invoices)
     total_revenue = db.query(func.sum(models.Invoice.total)).filter(
         models.Invoice.status == 'PAID'
@@ -168,7 +253,11 @@ def get_dashboard_metrics(db: Session = Depends(get_db)):
             overdue_count += 1
         total_outstanding += inv.total
 
-    total_invoices = db.query(models.Invoice).count()
+    # Archived invoices are always PAID, so they only add to revenue and the invoice count
+    archived_count, archived_revenue = archive.archived_totals(db)
+    total_revenue += archived_revenue
+
+    total_invoices = db.query(models.Invoice).count() + archived_count
 
     return {
         "totalRevenue": total_revenue,
@@ -177,15 +266,31 @@ def get_dashboard_metrics(db: Session = Depends(get_db)):
         "overdueCount": overdue_count
     }
 
-@app.post("/api/ai/query")
-async def handle_ai_query(request: AIQueryRequest, db: Session = Depends(get_db)):
-    if not openai.api_key:
-        raise HTTPException(status_code=503, detail="OpenAI API key not configured on the server.")
+@app.get("/api/metrics", response_model=schemas.DashboardMetrics)
+async def get_dashboard_metrics(tenant_id: Optional[str] = Depends(get_tenant)):
+    # Concurrent dashboard loads share a single metrics scan
+    return await coalescing.metrics.run(tenant_id, lambda: run_in_session(tenant_id, compute_dashboard_metrics))
 
+def answer_ai_query(query: str, db: Session) -> str:
     clients_data = db.query(models.Client).options(
-        joinedload(models.Client.invoices).joinedload(models.Invoice.items)
+        selectinload(models.Client.invoices).selectinload(models.Invoice.items)
     ).all()
 
+    # Archived invoices are part of the history the AI should reason about
+    archived_by_client = {}
+    for data in archive.iter_archived_invoices(db):
+        archived_by_client.setdefault(data["client"]["id"], []).append({
+            "invoice_number": data["invoiceNumber"],
+            "status": data["status"],
+            "issue_date": data["issueDate"],
+            "due_date": data["dueDate"],
+            "total_amount": data["total"],
+            "items": [
+                {"name": item["itemName"], "quantity": item["quantity"], "price": item["unitPrice"]}
+                for item in data["items"]
+            ],
+        })
+
     simplified_data = []
     for client in clients_data:
         client_info = {
@@ -203,7 +308,7 @@ async def handle_ai_query(request: AIQueryRequest, db: Session = Depends(get_db)
                     ],
                 }
                 for inv in client.invoices
-            ],
+            ] + archived_by_client.get(client.id, []),
         }
         simplified_data.append(client_info)
     
@@ -220,7 +325,7 @@ async def handle_ai_query(request: AIQueryRequest, db: Session = Depends(get_db)
     {json.dumps(simplified_data, indent=2)}
     ```
 
-    Based on the data above, please answer the following question: "{request.query}"
+    Based on the data above, please answer the following question: "{query}"
     """
 
     try:
@@ -231,20 +336,44 @@ async def handle_ai_query(request: AIQueryRequest, db: Session = Depends(get_db)
                 {"role": "user", "content": user_query},
             ]
         )
-        ai_response = completion.choices[0].message.content
-        return {"answer": ai_response}
+        return completion.choices[0].message.content
     except Exception as e:
         print(f"Error calling OpenAI: {e}")
         raise HTTPException(status_code=500, detail="An error occurred while communicating with the AI.")
 
-@app.get("/api/invoices/{invoice_id}/pdf")
-def generate_invoice_pdf(invoice_id: str, db: Session = Depends(get_db)):
+@app.post("/api/ai/query")
+async def handle_ai_query(request: AIQueryRequest, tenant_id: Optional[str] = Depends(get_tenant)):
+    if not openai.api_key:
+        raise HTTPException(status_code=503, detail="OpenAI API key not configured on the server.")
+
+    # Any write to clients, invoices or payments bumps the data version, which retires old answers
+    data_version = await run_in_threadpool(run_in_session, tenant_id, versioning.current_version)
+    key = ai_cache.make_key(tenant_id, request.query, data_version)
+    ai_response = ai_cache.answers.get(key)
+    if ai_response is None:
+        def compute_answer():
+            answer = run_in_session(tenant_id, answer_ai_query, request.query)
+            ai_cache.answers.put(key, answer)
+            return answer
+
+        # The data dump and the OpenAI call both block, so only the leader runs them, off the event loop
+        ai_response = await coalescing.ai_query.run(key, compute_answer)
+    return {"answer": ai_response}
+
+@app.get("/api/ai/cache/stats", response_model=schemas.AICacheStats)
+def get_ai_cache_stats():
+    return ai_cache.answers.stats()
+
+def render_invoice_pdf(invoice_id: str, db: Session):
+    """Returns the invoice number and the rendered PDF bytes."""
     # Fetch the invoice with all its details
     invoice = db.query(models.Invoice).options(
         joinedload(models.Invoice.client),
-        joinedload(models.Invoice.items)
+        selectinload(models.Invoice.items)
     ).filter(models.Invoice.id == invoice_id).first()
 
+    if not invoice:
+        invoice = archive.load_archived_invoice(db, invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
 
@@ -305,11 +434,16 @@ def generate_invoice_pdf(invoice_id: str, db: Session = Depends(get_db)):
     p.showPage()
     p.save()
 
-    # File-like buffer is now ready, "rewind" it to the beginning
-    buffer.seek(0)
-    
-    headers = {'Content-Disposition': f'inline; filename="invoice_{invoice.invoiceNumber}.pdf"'}
-    return StreamingResponse(buffer, headers=headers, media_type='application/pdf')
+    return invoice.invoiceNumber, buffer.getvalue()
+
+@app.get("/api/invoices/{invoice_id}/pdf")
+async def generate_invoice_pdf(invoice_id: str, tenant_id: Optional[str] = Depends(get_tenant)):
+    invoice_number, pdf_bytes = await coalescing.pdf.run(
+        (tenant_id, invoice_id), lambda: run_in_session(tenant_id, render_invoice_pdf, invoice_id)
+    )
+
+    headers = {'Content-Disposition': f'inline; filename="invoice_{invoice_number}.pdf"'}
+    return StreamingResponse(io.BytesIO(pdf_bytes), headers=headers, media_type='application/pdf')
 
 @app.post("/api/mock-email/send")
 def send_mock_email(email_data: schemas.EmailRequest, db: Session = Depends(get_db)): # <-- Use schemas.EmailRequest
@@ -323,47 +457,22 @@ def send_mock_email(email_data: schemas.EmailRequest, db: Session = Depends(get_
 
 @app.get("/api/invoices/{invoice_id}", response_model=schemas.InvoiceDetails)
 def get_invoice_details(invoice_id: str, db: Session = Depends(get_db)):
+    # The client is many-to-one so it can ride along in the main query, but items and
+    # payments are both one-to-many: joining them together would multiply the rows.
     invoice = db.query(models.Invoice).options(
         joinedload(models.Invoice.client),
-        joinedload(models.Invoice.items),
-        joinedload(models.Invoice.payments) # <-- Eagerly load payments
+        selectinload(models.Invoice.items),
+        selectinload(models.Invoice.payments)
     ).filter(models.Invoice.id == invoice_id).first()
     
+    if not invoice:
+        invoice = archive.load_archived_invoice(db, invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
         
     return invoice
 
-@app.post("/api/invoices/{invoice_id}/payments", response_model=schemas.InvoiceDetails)
-def record_payment(invoice_id: str, payment: schemas.PaymentCreate, db: Session = Depends(get_db)):
-    # Use a transaction to ensure data integrity
-    with db.begin_nested():
-        invoice = db.query(models.Invoice).with_for_update().options(
-            joinedload(models.Invoice.payments)
-        ).filter(models.Invoice.id == invoice_id).first()
-        
-        if not invoice:
-            raise HTTPException(status_code=404, detail="Invoice not found")
-
-        # Create new payment record
-        db_payment = models.Payment(invoiceId=invoice_id, amount=payment.amount, method=payment.method)
-        db.add(db_payment)
-        
-        # Recalculate status based on all payments
-        total_paid = sum(p.amount for p in invoice.payments) + payment.amount
-        
-        if total_paid >= invoice.total:
-            invoice.status = models.InvoiceStatusEnum.PAID
-        else:
-            # If partially paid, ensure it's not marked as PAID
-            invoice.status = models.InvoiceStatusEnum.UNPAID
-        
-        db.commit()
-    
-    return get_invoice_details(invoice_id, db)
-
-@app.get("/api/export/invoices/csv")
-def export_invoices_to_csv(db: Session = Depends(get_db)):
+def build_invoices_csv(db: Session) -> str:
     try:
         invoices_to_export = db.query(models.Invoice).options(
             joinedload(models.Invoice.client)
@@ -377,36 +486,51 @@ def export_invoices_to_csv(db: Session = Depends(get_db)):
 
     writer.writerow(['Invoice #', 'Client Name', 'Status', 'Issue Date', 'Due Date', 'Total Amount'])
 
-    for inv in invoices_to_export:
-        current_status = inv.status.value
-        if inv.status == models.InvoiceStatusEnum.UNPAID and inv.dueDate < datetime.utcnow():
-            current_status = models.InvoiceStatusEnum.OVERDUE.value
+    rows = [
+        (inv.invoiceNumber, inv.client.name, display_status(inv), inv.issueDate, inv.dueDate, inv.total)
+        for inv in invoices_to_export
+    ]
+    # The export covers the full history, so archived invoices are merged back in by issue date
+    rows.extend(archive.archived_export_rows(db))
+    rows.sort(key=lambda row: row[3], reverse=True)
 
+    for invoice_number, client_name, status, issue_date, due_date, total in rows:
         writer.writerow([
-            inv.invoiceNumber,
-            inv.client.name,
-            current_status,
-            inv.issueDate.strftime('%Y-%m-%d'),
-            inv.dueDate.strftime('%Y-%m-%d'),
-            inv.total
+            invoice_number,
+            client_name,
+            status,
+            issue_date.strftime('%Y-%m-%d'),
+            due_date.strftime('%Y-%m-%d'),
+            total
         ])
-    output.seek(0)
-    
+    return output.getvalue()
+
+@app.get("/api/export/invoices/csv")
+async def export_invoices_to_csv(tenant_id: Optional[str] = Depends(get_tenant)):
+    content = await coalescing.export.run(tenant_id, lambda: run_in_session(tenant_id, build_invoices_csv))
+
     headers = {
         'Content-Disposition': 'attachment; filename="invoices_export.csv"'
     }
-    return StreamingResponse(output, headers=headers, media_type='text/csv')
+    return StreamingResponse(io.StringIO(content), headers=headers, media_type='text/csv')
 
-@app.post("/api/invoices/{invoice_id}/payments", response_model=schemas.InvoiceDetails)
-def record_payment(invoice_id: str, payment: schemas.PaymentCreate, db: Session = Depends(get_db)):
+@app.post("/api/invoices/{invoice_id}/payments", response_model=schemas.PaymentReceipt)
+def record_payment(invoice_id: str, payment: schemas.PaymentCreate, tenant_id: Optional[str] = Depends(get_tenant), db: Session = Depends(get_db)):
+    # Only lock and load the columns needed to settle the balance
     invoice = db.query(models.Invoice).with_for_update().options(
-        joinedload(models.Invoice.payments)
+        load_only(
+            models.Invoice.id, models.Invoice.invoiceNumber, models.Invoice.total,
+            models.Invoice.status, models.Invoice.dueDate
+        )
     ).filter(models.Invoice.id == invoice_id).first()
     
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
+    previous_status = display_status(invoice)
 
-    total_paid_before = sum(p.amount for p in invoice.payments)
+    total_paid_before = db.query(func.coalesce(func.sum(models.Payment.amount), 0.0)).filter(
+        models.Payment.invoiceId == invoice_id
+    ).scalar()
     if payment.amount > (invoice.total - total_paid_before + 0.001): # Add tolerance for float issues
         raise HTTPException(status_code=400, detail="Payment amount cannot exceed the balance due.")
 
@@ -433,17 +557,51 @@ def record_payment(invoice_id: str, payment: schemas.PaymentCreate, db: Session
     )
 
     db.commit()
+    db.refresh(db_payment)
+
+    balance_due = max(invoice.total - total_paid_after, 0.0)
+    bus.publish(tenant_id, "invoice.updated", {
+        "id": invoice.id,
+        "status": display_status(invoice),
+        "previousStatus": previous_status,
+        "total": invoice.total,
+        "amountPaid": total_paid_after,
+        "balanceDue": balance_due,
+    })
 
-    db.refresh(invoice)
+    return {
+        "invoiceId": invoice.id,
+        "status": invoice.status,
+        "total": invoice.total,
+        "amountPaid": total_paid_after,
+        "balanceDue": balance_due,
+        "payment": db_payment,
+    }
 
-    return get_invoice_details(invoice_id, db)
+@app.post("/api/archive/run", response_model=schemas.ArchiveResult)
+def run_archive(older_than_days: int = archive.ARCHIVE_AFTER_DAYS, tenant_id: Optional[str] = Depends(get_tenant), db: Session = Depends(get_db)):
+    if older_than_days < 0:
+        raise HTTPException(status_code=400, detail="older_than_days must not be negative.")
+    archived = archive.archive_settled_invoices(db, older_than_days)
+    if archived:
+        bus.publish(tenant_id, "invoices.archived", {"count": archived})
+    return {"archived": archived, "olderThanDays": older_than_days}
+
+@app.get("/api/events")
+async def stream_changes(request: Request, tenant_id: Optional[str] = Depends(get_tenant), last_event_id: Optional[str] = Header(None)):
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return StreamingResponse(
+        bus.stream(request, tenant_id, last_event_id or request.query_params.get("lastEventId")),
+        headers=headers,
+        media_type='text/event-stream'
+    )
 
 @app.get("/api/audit-logs", response_model=List[schemas.AuditLog])
 def get_audit_logs(db: Session = Depends(get_db)):
     return db.query(models.AuditLog).order_by(models.AuditLog.timestamp.desc()).limit(100).all()
 
 @app.post("/api/import/clients/csv")
-async def import_clients_from_csv(db: Session = Depends(get_db), file: UploadFile = File(...)):
+async def import_clients_from_csv(tenant_id: Optional[str] = Depends(get_tenant), db: Session = Depends(get_db), file: UploadFile = File(...)):
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Invalid file type.")
     try:
@@ -456,10 +614,12 @@ async def import_clients_from_csv(db: Session = Depends(get_db), file: UploadFil
             client_data = schemas.ClientCreate(**row)
             new_clients.append(models.Client(**client_data.model_dump()))
         except ValidationError as e:
-            errors.append(f"Row {i + 2}: {[f'{err['loc'][0]}: {err['msg']}' for err in e.errors()]}")
+            messages = [f"{err['loc'][0]}: {err['msg']}" for err in e.errors()]
+            errors.append(f"Row {i + 2}: {messages}")
     if errors:
         raise HTTPException(status_code=422, detail={"message": f"Import failed with {len(errors)} error(s).", "errors": errors})
     db.add_all(new_clients)
     log_activity(db, 'Client', 'Multiple', 'IMPORT', f"Imported {len(new_clients)} clients from CSV.")
     db.commit()
+    await run_in_threadpool(bus.publish, tenant_id, "clients.imported", {"count": len(new_clients)})
     return {"message": f"Successfully imported {len(new_clients)} clients."}
\ No newline at end of file
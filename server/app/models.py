@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Float, Integer, DateTime, Enum as SQLEnum, ForeignKey
+from sqlalchemy import Column, String, Float, Integer, DateTime, LargeBinary, Text, Enum as SQLEnum, ForeignKey
 from sqlalchemy.orm import relationship
-from .database import Base
+from .database import Base, ControlBase
 import enum
 import uuid
 from datetime import datetime
@@ -24,6 +24,13 @@ class Client(Base):
     
     invoices = relationship("Invoice", back_populates="client", cascade="all, delete-orphan")
 
+class Tenant(ControlBase):
+    # Registry of provisioned tenants in multi-tenant mode; only these get a shard
+    __tablename__ = "tenants"
+    id = Column(String, primary_key=True)
+    name = Column(String, nullable=False)
+    createdAt = Column(DateTime, default=datetime.utcnow, nullable=False)
+
 class Invoice(Base):
     __tablename__ = "invoices"
     id = Column(String, primary_key=True, default=generate_uuid)
@@ -66,4 +73,62 @@ class AuditLog(Base):
     entity_type = Column(String, nullable=False)
     entity_id = Column(String, nullable=False)
     action = Column(String, nullable=False) 
-    details = Column(String, nullable=True) 
\ No newline at end of file
+    details = Column(String, nullable=True)
+
+class ArchivedInvoice(Base):
+    # Append-only manifest of settled invoices moved out of the hot tables.
+    # The full invoice (client, items, payments, audit logs) lives compressed in `payload`.
+    __tablename__ = "archived_invoices"
+    id = Column(String, primary_key=True)
+    invoiceNumber = Column(String, unique=True, index=True, nullable=False)
+    clientId = Column(String, index=True, nullable=False)
+    issueDate = Column(DateTime, nullable=False)
+    dueDate = Column(DateTime, nullable=False)
+    total = Column(Float, nullable=False)
+    archivedAt = Column(DateTime, default=datetime.utcnow, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+
+class ArchivedPayment(Base):
+    # Payments of archived invoices, unpacked from the payload so statements can still ledger them
+    __tablename__ = "archived_payments"
+    id = Column(String, primary_key=True)
+    invoiceId = Column(String, index=True, nullable=False)
+    clientId = Column(String, index=True, nullable=False)
+    invoiceNumber = Column(String, nullable=False)
+    amount = Column(Float, nullable=False)
+    paymentDate = Column(DateTime, nullable=False)
+    method = Column(String, nullable=True)
+
+class ChangeEvent(Base):
+    # Change notifications for the live-update feed; the id is the SSE event id every worker agrees on
+    __tablename__ = "change_events"
+    __table_args__ = {"sqlite_autoincrement": True}
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    type = Column(String, nullable=False)
+    data = Column(Text, nullable=False)
+    createdAt = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
+
+class IdempotencyKey(Base):
+    # A row is claimed with statusCode NULL while the request runs, then filled with the response
+    __tablename__ = "idempotency_keys"
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    statusCode = Column(Integer, nullable=True)
+    mediaType = Column(String, nullable=True)
+    responseBody = Column(LargeBinary, nullable=True)
+    createdAt = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
+
+class CatalogItem(Base):
+    # Line items seen on invoices, keyed by their normalized name, for autocomplete
+    __tablename__ = "catalog_items"
+    key = Column(String, primary_key=True)
+    itemName = Column(String, nullable=False)
+    usageCount = Column(Integer, default=0, nullable=False)
+    lastPrice = Column(Float, nullable=False)
+    lastUsedAt = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class DataVersion(Base):
+    # Single-row counter bumped by every write to business data, used to key derived caches
+    __tablename__ = "data_versions"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
@@ -50,6 +50,7 @@ class Invoice(BaseModel):
     dueDate: datetime
     status: InvoiceStatusEnum
     total: float
+    clientId: str
     client: InvoiceClientInfo  # Use a simpler client schema for the list view
     
     class Config:
@@ -59,12 +60,25 @@ class Invoice(BaseModel):
 class InvoiceDetails(Invoice):
     items: List[InvoiceItem] # Include items only for the detail view
 
+class ItemSuggestion(BaseModel):
+    itemName: str
+    usageCount: int
+    lastPrice: float
+
 class DashboardMetrics(BaseModel):
     totalRevenue: float
     totalOutstanding: float
     totalInvoices: int
     overdueCount: int
     
+class AICacheStats(BaseModel):
+    size: int
+    maxSize: int
+    hits: int
+    misses: int
+    evictions: int
+    hitRate: float
+
 class EmailRequest(BaseModel):
     recipient_email: str
     subject: str
@@ -89,7 +103,20 @@ class EmailRequest(BaseModel):
 class InvoiceDetails(Invoice):
     items: List[InvoiceItem]
     payments: List[Payment] = []
+
+# Lightweight response for recording a payment, avoids reloading every item and payment
+class PaymentReceipt(BaseModel):
+    invoiceId: str
+    status: InvoiceStatusEnum
+    total: float
+    amountPaid: float
+    balanceDue: float
+    payment: Payment
     
+class ArchiveResult(BaseModel):
+    archived: int
+    olderThanDays: int
+
 class AuditLog(BaseModel):
     id: str
     timestamp: datetime
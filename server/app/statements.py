@@ -0,0 +1,208 @@
+import io
+import json
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from . import models
+
+STATEMENT_BATCH_SIZE = 500
+DATE_ONLY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def inclusive_end(raw: Optional[str], end: Optional[datetime]) -> Optional[datetime]:
+    """A date-only `end` (e.g. 2020-03-01) covers that whole day, not just its first instant."""
+    if end is not None and raw and DATE_ONLY.match(raw.strip()):
+        return end + timedelta(days=1) - timedelta(microseconds=1)
+    return end
+
+
+def _date_filter(column, start: Optional[datetime], end: Optional[datetime]):
+    conditions = []
+    if start:
+        conditions.append(column >= start)
+    if end:
+        conditions.append(column <= end)
+    return conditions
+
+
+def opening_balance(db: Session, client_id: str, cutoff: Optional[datetime]) -> float:
+    """Everything invoiced minus everything paid before the cutoff, archived or not."""
+    if not cutoff:
+        return 0.0
+
+    invoiced = db.query(func.coalesce(func.sum(models.Invoice.total), 0.0)).filter(
+        models.Invoice.clientId == client_id,
+        models.Invoice.issueDate < cutoff
+    ).scalar()
+    paid = db.query(func.coalesce(func.sum(models.Payment.amount), 0.0)).join(models.Invoice).filter(
+        models.Invoice.clientId == client_id,
+        models.Payment.paymentDate < cutoff
+    ).scalar()
+    invoiced += db.query(func.coalesce(func.sum(models.ArchivedInvoice.total), 0.0)).filter(
+        models.ArchivedInvoice.clientId == client_id,
+        models.ArchivedInvoice.issueDate < cutoff
+    ).scalar()
+    paid += db.query(func.coalesce(func.sum(models.ArchivedPayment.amount), 0.0)).filter(
+        models.ArchivedPayment.clientId == client_id,
+        models.ArchivedPayment.paymentDate < cutoff
+    ).scalar()
+    return invoiced - paid
+
+
+def ledger_query(client_id: str, start: Optional[datetime], end: Optional[datetime], opening: float):
+    """Invoices and payments, hot and archived, merged into one chronological ledger.
+
+    The running balance is computed by the database with a window function, so the
+    rows can be streamed without holding the client's history in memory.
+    """
+    invoices = select(
+        literal("INVOICE").label("kind"),
+        models.Invoice.id.label("entryId"),
+        models.Invoice.invoiceNumber.label("reference"),
+        models.Invoice.issueDate.label("date"),
+        models.Invoice.total.label("debit"),
+        literal(0.0).label("credit"),
+    ).where(models.Invoice.clientId == client_id, *_date_filter(models.Invoice.issueDate, start, end))
+
+    payments = select(
+        literal("PAYMENT").label("kind"),
+        models.Payment.id.label("entryId"),
+        models.Invoice.invoiceNumber.label("reference"),
+        models.Payment.paymentDate.label("date"),
+        literal(0.0).label("debit"),
+        models.Payment.amount.label("credit"),
+    ).join(models.Invoice, models.Payment.invoiceId == models.Invoice.id).where(
+        models.Invoice.clientId == client_id, *_date_filter(models.Payment.paymentDate, start, end)
+    )
+
+    archived_invoices = select(
+        literal("INVOICE").label("kind"),
+        models.ArchivedInvoice.id.label("entryId"),
+        models.ArchivedInvoice.invoiceNumber.label("reference"),
+        models.ArchivedInvoice.issueDate.label("date"),
+        models.ArchivedInvoice.total.label("debit"),
+        literal(0.0).label("credit"),
+    ).where(
+        models.ArchivedInvoice.clientId == client_id,
+        *_date_filter(models.ArchivedInvoice.issueDate, start, end)
+    )
+
+    archived_payments = select(
+        literal("PAYMENT").label("kind"),
+        models.ArchivedPayment.id.label("entryId"),
+        models.ArchivedPayment.invoiceNumber.label("reference"),
+        models.ArchivedPayment.paymentDate.label("date"),
+        literal(0.0).label("debit"),
+        models.ArchivedPayment.amount.label("credit"),
+    ).where(
+        models.ArchivedPayment.clientId == client_id,
+        *_date_filter(models.ArchivedPayment.paymentDate, start, end)
+    )
+
+    ledger = union_all(invoices, payments, archived_invoices, archived_payments).subquery()
+    ordering = (ledger.c.date, ledger.c.kind, ledger.c.entryId)
+    balance = literal(opening) + func.sum(ledger.c.debit - ledger.c.credit).over(
+        order_by=ordering, rows=(None, 0)
+    )
+    return select(ledger, balance.label("balance")).order_by(*ordering)
+
+
+def _iter_entries(db: Session, client_id: str, start, end, opening: float):
+    stmt = ledger_query(client_id, start, end, opening).execution_options(yield_per=STATEMENT_BATCH_SIZE)
+    for batch in db.execute(stmt).partitions():
+        yield batch
+
+
+def _entry_dict(row) -> dict:
+    return {
+        "type": "entry",
+        "kind": row.kind,
+        "reference": row.reference,
+        "date": row.date.isoformat() if isinstance(row.date, datetime) else row.date,
+        "debit": row.debit,
+        "credit": row.credit,
+        "balance": row.balance,
+    }
+
+
+def stream_statement_jsonl(db: Session, client: models.Client, start, end):
+    """Yields the statement as JSON lines: an opening line, the entries, then a closing line."""
+    opening = opening_balance(db, client.id, start)
+    yield json.dumps({
+        "type": "opening",
+        "clientId": client.id,
+        "clientName": client.name,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "openingBalance": opening,
+    }) + "\n"
+
+    closing = opening
+    for batch in _iter_entries(db, client.id, start, end, opening):
+        lines = [json.dumps(_entry_dict(row)) for row in batch]
+        closing = batch[-1].balance
+        yield "\n".join(lines) + "\n"
+
+    yield json.dumps({"type": "closing", "closingBalance": closing}) + "\n"
+
+
+def build_statement_pdf(db: Session, client: models.Client, start, end) -> io.BytesIO:
+    """Draws the statement page by page while reading the ledger in batches."""
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    def draw_header():
+        p.setFont("Helvetica-Bold", 16)
+        p.drawString(inch, height - inch, f"Statement: {client.name}")
+        p.setFont("Helvetica", 10)
+        period = f"{start.strftime('%Y-%m-%d') if start else 'Beginning'} to {end.strftime('%Y-%m-%d') if end else 'Today'}"
+        p.drawString(inch, height - 1.25 * inch, period)
+        y = height - 1.75 * inch
+        p.setFont("Helvetica-Bold", 10)
+        p.drawString(inch, y, "Date")
+        p.drawString(2.2 * inch, y, "Reference")
+        p.drawString(width - 4 * inch, y, "Charges")
+        p.drawString(width - 2.9 * inch, y, "Payments")
+        p.drawString(width - 1.8 * inch, y, "Balance")
+        p.line(inch, y - 0.1 * inch, width - inch, y - 0.1 * inch)
+        p.setFont("Helvetica", 10)
+        return y - 0.3 * inch
+
+    opening = opening_balance(db, client.id, start)
+    y_position = draw_header()
+    p.drawString(2.2 * inch, y_position, "Opening balance")
+    p.drawString(width - 1.8 * inch, y_position, f"${opening:.2f}")
+    y_position -= 0.22 * inch
+
+    closing = opening
+    for batch in _iter_entries(db, client.id, start, end, opening):
+        for row in batch:
+            if y_position < inch:
+                p.showPage()
+                y_position = draw_header()
+            p.drawString(inch, y_position, row.date.strftime("%Y-%m-%d"))
+            p.drawString(2.2 * inch, y_position, f"{row.kind.title()} {row.reference}")
+            if row.debit:
+                p.drawString(width - 4 * inch, y_position, f"${row.debit:.2f}")
+            if row.credit:
+                p.drawString(width - 2.9 * inch, y_position, f"${row.credit:.2f}")
+            p.drawString(width - 1.8 * inch, y_position, f"${row.balance:.2f}")
+            y_position -= 0.22 * inch
+            closing = row.balance
+
+    p.setFont("Helvetica-Bold", 12)
+    p.drawString(width - 3.5 * inch, y_position - 0.4 * inch, "Closing Balance:")
+    p.drawString(width - 1.8 * inch, y_position - 0.4 * inch, f"${closing:.2f}")
+
+    p.showPage()
+    p.save()
+    buffer.seek(0)
+    return buffer
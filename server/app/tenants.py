@@ -0,0 +1,74 @@
+"""Registry of provisioned tenants for multi-tenant mode.
+
+A shard is only ever opened for a tenant listed here, so a mistyped X-Tenant-ID or a
+caller walking through slugs gets a 404 instead of a fresh, empty database.
+Tenants are provisioned explicitly:
+
+    python -m app.tenants create acme "Acme Inc."
+    python -m app.tenants list
+"""
+import argparse
+import threading
+
+from . import database, models
+
+# Registered tenants are never removed, so positive lookups can be remembered
+_known = set()
+_lock = threading.Lock()
+
+
+def ensure_registry():
+    models.ControlBase.metadata.create_all(bind=database.engine)
+
+
+def is_registered(tenant_id: str) -> bool:
+    with _lock:
+        if tenant_id in _known:
+            return True
+    with database.SessionLocal() as db:
+        found = db.get(models.Tenant, tenant_id) is not None
+    if found:
+        with _lock:
+            _known.add(tenant_id)
+    return found
+
+
+def provision(raw_tenant_id: str, name: str) -> str:
+    """Registers the tenant and creates its shard up front. Returns the canonical id."""
+    if database.shard_router is None:
+        raise RuntimeError("Tenants can only be provisioned with MULTI_TENANT=1.")
+    tenant_id = database.normalize_tenant_id(raw_tenant_id)
+    if not tenant_id:
+        raise ValueError(f"Invalid tenant id: {raw_tenant_id!r}")
+
+    ensure_registry()
+    with database.SessionLocal() as db:
+        if db.get(models.Tenant, tenant_id) is None:
+            db.add(models.Tenant(id=tenant_id, name=name))
+            db.commit()
+    database.shard_router.get_sessionmaker(tenant_id)
+    with _lock:
+        _known.add(tenant_id)
+    return tenant_id
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.tenants", description="Manage tenants.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="Provision a tenant and create its shard.")
+    create.add_argument("tenant_id")
+    create.add_argument("name")
+    commands.add_parser("list", help="List provisioned tenants.")
+    args = parser.parse_args(argv)
+
+    if args.command == "create":
+        print(f"Provisioned tenant {provision(args.tenant_id, args.name)}")
+        return
+    ensure_registry()
+    with database.SessionLocal() as db:
+        for tenant in db.query(models.Tenant).order_by(models.Tenant.id):
+            print(f"{tenant.id}\t{tenant.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Writes to these tables change what the AI sees, so they bump the data version
+TRACKED_MODELS = (models.Client, models.Invoice, models.InvoiceItem, models.Payment, models.ArchivedInvoice)
+
+@event.listens_for(models.DataVersion.__table__, "after_create")
+def _seed(target, connection, **kw):
+    # Every database (and every tenant shard) starts with its single version row;
+    # a Core insert on the creating connection honours a tenant's schema_translate_map
+    connection.execute(target.insert(), {"id": 1, "version": 0})
+
+
+def current_version(db: Session) -> int:
+    return db.query(models.DataVersion.version).filter(models.DataVersion.id == 1).scalar() or 0
+
+
+def _mark_changed(session):
+    session.info["data_changed"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_on_flush(session, flush_context):
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if any(isinstance(obj, TRACKED_MODELS) for obj in changed):
+        _mark_changed(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_on_bulk_write(orm_execute_state):
+    # Bulk query.update()/delete() bypass the flush, e.g. the archive's hot-table cleanup
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, TRACKED_MODELS):
+        _mark_changed(orm_execute_state.session)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session):
+    # Bumped in its own short transaction after the write commits, so writers only
+    # contend on the version row for one statement instead of their whole transaction
+    if not session.info.pop("data_changed", False):
+        return
+    try:
+        with session.get_bind().begin() as connection:
+            connection.execute(
+                update(models.DataVersion).where(models.DataVersion.id == 1).values(version=models.DataVersion.version + 1)
+            )
+    except Exception as e:
+        # The write itself has committed; failing here would make the caller retry it
+        print(f"Warning: Could not bump data version - {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("data_changed", None)
@@ -0,0 +1,82 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import event
+
+
+def pytest_configure(config):
+    # The app opens ./database.db (and other ./ files) relative to the working directory,
+    # so point it at a scratch directory before any test module imports it
+    os.chdir(tempfile.mkdtemp(prefix="invoice-app-tests-"))
+
+
+@pytest.fixture(autouse=True)
+def fresh_db():
+    from app import database, models
+
+    models.Base.metadata.drop_all(bind=database.engine)
+    models.Base.metadata.create_all(bind=database.engine)
+    yield
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from app import main
+
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def db():
+    from app import database
+
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+@pytest.fixture
+def query_counter():
+    from app import database
+
+    counter = QueryCounter()
+    event.listen(database.engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(database.engine, "before_cursor_execute", counter)
+
+
+@pytest.fixture
+def make_client(client):
+    def _make(name="Acme", email=None):
+        email = email or f"{name.lower().replace(' ', '')}@example.com"
+        response = client.post("/api/clients", json={"name": name, "email": email, "address": "1 Main St"})
+        assert response.status_code == 201
+        return response.json()
+    return _make
+
+
+@pytest.fixture
+def make_invoice(client):
+    def _make(client_id, items=None, issue_date="2024-01-01T00:00:00", due_date="2030-01-01T00:00:00", headers=None):
+        items = items if items is not None else [{"itemName": "Widget", "quantity": 1, "unitPrice": 100.0}]
+        response = client.post("/api/invoices", json={
+            "clientId": client_id,
+            "issueDate": issue_date,
+            "dueDate": due_date,
+            "items": items,
+        }, headers=headers or {})
+        assert response.status_code == 201
+        return response.json()
+    return _make
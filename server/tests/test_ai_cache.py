@@ -0,0 +1,83 @@
+import os
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import ai_cache, main, models, versioning
+
+
+@pytest.fixture
+def answers(tmp_path, monkeypatch):
+    cache = ai_cache.AnswerCache(path=str(tmp_path / "ai_cache.json"))
+    monkeypatch.setattr(ai_cache, "answers", cache)
+    return cache
+
+
+@pytest.fixture
+def fake_ai(monkeypatch):
+    questions = []
+
+    def answer(query, db):
+        questions.append(query)
+        return f"answer {len(questions)}"
+
+    monkeypatch.setattr(main.openai, "api_key", "test-key")
+    monkeypatch.setattr(main, "answer_ai_query", answer)
+    return questions
+
+
+def test_version_is_bumped_after_commit(db):
+    before = versioning.current_version(db)
+
+    db.add(models.Client(name="A", email="a@example.com", address="x"))
+    db.flush()
+    assert versioning.current_version(db) == before
+    db.commit()
+
+    assert versioning.current_version(db) == before + 1
+
+
+def test_rolled_back_write_does_not_bump(db):
+    before = versioning.current_version(db)
+
+    db.add(models.Client(name="A", email="a@example.com", address="x"))
+    db.flush()
+    db.rollback()
+    db.commit()
+
+    assert versioning.current_version(db) == before
+
+
+def test_failed_bump_does_not_fail_the_commit(db, monkeypatch, capsys):
+    def locked(*args, **kwargs):
+        raise OperationalError("UPDATE data_versions", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(versioning, "update", locked)
+
+    db.add(models.Client(name="A", email="a@example.com", address="x"))
+    db.commit()
+
+    assert db.query(models.Client).count() == 1
+    assert "Could not bump data version" in capsys.readouterr().out
+
+
+def test_answers_are_reused_until_the_data_changes(client, make_client, answers, fake_ai):
+    ask = lambda: client.post("/api/ai/query", json={"query": "Who owes  me money?"}).json()["answer"]
+
+    assert ask() == "answer 1"
+    assert ask() == "answer 1"
+    make_client()
+    assert ask() == "answer 2"
+
+    stats = client.get("/api/ai/cache/stats").json()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 2)
+
+
+def test_cache_survives_restart_without_leaving_temp_files(tmp_path):
+    path = str(tmp_path / "ai_cache.json")
+    first, second = ai_cache.AnswerCache(path=path), ai_cache.AnswerCache(path=path)
+    first.put("k1", "one")
+    second.put("k2", "two")
+
+    assert ai_cache.AnswerCache(path=path).get("k2") == "two"
+    assert os.listdir(tmp_path) == ["ai_cache.json"]
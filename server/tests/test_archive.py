@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from app import main, models
+
+
+def _settled_invoice(client, make_client, make_invoice, email=None):
+    customer = make_client(email=email)
+    invoice = make_invoice(customer["id"], issue_date="2019-01-01T00:00:00", due_date="2019-02-01T00:00:00")
+    client.post(f"/api/invoices/{invoice['id']}/payments", json={"amount": 100.0})
+    return customer, invoice
+
+
+def test_archived_invoice_reads_through(client, make_client, make_invoice):
+    _, invoice = _settled_invoice(client, make_client, make_invoice)
+    before = client.get(f"/api/invoices/{invoice['id']}").json()
+    metrics_before = client.get("/api/metrics").json()
+
+    result = client.post("/api/archive/run").json()
+
+    assert result["archived"] == 1
+    assert client.get("/api/invoices").json() == []
+    assert client.get(f"/api/invoices/{invoice['id']}").json() == before
+    assert client.get(f"/api/invoices/{invoice['id']}/pdf").status_code == 200
+    assert client.get("/api/metrics").json() == metrics_before
+
+
+def test_unsettled_and_recent_invoices_stay_hot(client, make_client, make_invoice):
+    customer = make_client()
+    make_invoice(customer["id"], issue_date="2019-01-01T00:00:00")
+    recent = make_invoice(customer["id"], issue_date="2099-01-01T00:00:00")
+    client.post(f"/api/invoices/{recent['id']}/payments", json={"amount": 100.0})
+
+    assert client.post("/api/archive/run").json()["archived"] == 0
+    assert len(client.get("/api/invoices").json()) == 2
+
+
+def test_invoice_numbers_are_not_reused_after_archiving(client, make_client, make_invoice):
+    customer, invoice = _settled_invoice(client, make_client, make_invoice)
+    client.post("/api/archive/run")
+
+    new_invoice = make_invoice(customer["id"])
+
+    assert new_invoice["invoiceNumber"] != invoice["invoiceNumber"]
+
+
+def test_deleting_client_removes_archived_invoices(client, db, make_client, make_invoice):
+    customer, invoice = _settled_invoice(client, make_client, make_invoice)
+    client.post("/api/archive/run")
+
+    assert client.delete(f"/api/clients/{customer['id']}").status_code == 204
+
+    assert client.get(f"/api/invoices/{invoice['id']}").status_code == 404
+    assert client.get(f"/api/invoices/{invoice['id']}/pdf").status_code == 404
+    metrics = client.get("/api/metrics").json()
+    assert metrics["totalRevenue"] == 0.0
+    assert metrics["totalInvoices"] == 0
+    assert db.query(models.ArchivedPayment).count() == 0
+
+
+def test_export_and_ai_data_include_archived_invoices(client, make_client, make_invoice, monkeypatch):
+    customer, invoice = _settled_invoice(client, make_client, make_invoice)
+    make_invoice(customer["id"], issue_date="2099-01-01T00:00:00")
+    client.post("/api/archive/run")
+
+    export = client.get("/api/export/invoices/csv").text.splitlines()
+    assert len(export) == 3
+    assert export[2].startswith(f"{invoice['invoiceNumber']},Acme,PAID,2019-01-01,2019-02-01,")
+
+    prompts = []
+
+    def create(model, messages):
+        prompts.append(messages[1]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+    monkeypatch.setattr(main.openai.chat.completions, "create", create)
+    with main.database.SessionLocal() as db:
+        main.answer_ai_query("What did Acme buy in 2019?", db)
+    assert f'"invoice_number": "{invoice["invoiceNumber"]}"' in prompts[0]
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from app import catalog, database, models
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes(monkeypatch):
+    monkeypatch.setattr(catalog, "_indexes", OrderedDict())
+
+
+def _names(client, q):
+    response = client.get("/api/items/suggest", params={"q": q})
+    assert response.status_code == 200
+    return [s["itemName"] for s in response.json()]
+
+
+def test_history_is_backfilled_when_the_table_is_created(client, make_client, make_invoice):
+    customer = make_client()
+    make_invoice(customer["id"], items=[{"itemName": "Widget historic", "quantity": 1, "unitPrice": 9.0}])
+    table = models.CatalogItem.__table__
+    table.drop(bind=database.engine)
+    table.create(bind=database.engine)
+
+    # A new invoice is recorded before anyone asks for suggestions
+    make_invoice(customer["id"], items=[{"itemName": "Widget new", "quantity": 1, "unitPrice": 1.0}])
+
+    assert sorted(_names(client, "wid")) == ["Widget historic", "Widget new"]
+
+
+def test_new_items_show_up_in_a_loaded_index(client, make_client, make_invoice):
+    customer = make_client()
+    make_invoice(customer["id"], items=[{"itemName": "Gadget", "quantity": 1, "unitPrice": 1.0}])
+    assert _names(client, "ga") == ["Gadget"]
+
+    make_invoice(customer["id"], items=[{"itemName": "Gasket", "quantity": 1, "unitPrice": 2.0}])
+    make_invoice(customer["id"], items=[{"itemName": "Gasket", "quantity": 1, "unitPrice": 2.0}])
+
+    assert _names(client, "ga") == ["Gasket", "Gadget"]
+
+
+def test_loading_one_tenant_does_not_block_another(db, monkeypatch):
+    original = catalog._load_index
+    slow_started = threading.Event()
+
+    def load_index(session):
+        if not slow_started.is_set():
+            slow_started.set()
+            time.sleep(1.0)
+        return original(session)
+
+    def load_slow_tenant():
+        with database.SessionLocal() as session:
+            catalog.get_index(session, "slow")
+
+    monkeypatch.setattr(catalog, "_load_index", load_index)
+    loader = threading.Thread(target=load_slow_tenant)
+    loader.start()
+    slow_started.wait()
+
+    started = time.monotonic()
+    catalog.get_index(db, "fast")
+    elapsed = time.monotonic() - started
+    loader.join()
+
+    assert elapsed < 0.5
+
+
+def test_loaded_indexes_are_bounded(db, monkeypatch):
+    monkeypatch.setattr(catalog, "MAX_INDEXES", 2)
+    for tenant in ("a", "b", "c"):
+        catalog.get_index(db, tenant)
+
+    assert list(catalog._indexes) == ["b", "c"]
+
+
+def _index(usage_by_key):
+    rows = [
+        SimpleNamespace(key=key, itemName=key, usageCount=usage, lastPrice=1.0)
+        for key, usage in usage_by_key.items()
+    ]
+    return catalog.PrefixIndex(rows)
+
+
+def test_prefix_matches_keys_beyond_the_bmp():
+    index = _index({"a\U0001F600 widget": 3, "a widget": 1, "b widget": 5})
+
+    assert [name for name, _, _ in index.suggest("a", 10)] == ["a\U0001F600 widget", "a widget"]
+
+
+def test_cached_top_suggestions_follow_upserts(monkeypatch):
+    monkeypatch.setattr(catalog, "SCAN_LIMIT", 2)
+    index = _index({"widget a": 5, "widget b": 4, "widget c": 1, "gadget": 9})
+    assert [name for name, _, _ in index.suggest("w", 2)] == ["widget a", "widget b"]
+    assert "w" in index._top
+
+    index.upsert("widget c", "widget c", 7, 1.0)
+    index.upsert("widget d", "widget d", 6, 1.0)
+
+    assert [name for name, _, _ in index.suggest("w", 3)] == ["widget c", "widget d", "widget a"]
+
+
+def test_short_prefix_lookups_are_fast():
+    index = _index({f"{chr(97 + n % 26)}item {n}": n % 1000 for n in range(200_000)})
+    index.suggest("a", 10)
+
+    started = time.perf_counter()
+    for _ in range(100):
+        index.suggest("a", 10)
+
+    assert (time.perf_counter() - started) / 100 < 0.001
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app import coalescing, main
+
+
+def _slow_metrics(calls, delay=0.5):
+    lock = threading.Lock()
+
+    def compute(db):
+        with lock:
+            calls.append(threading.get_ident())
+        time.sleep(delay)
+        return {"totalRevenue": 0.0, "totalOutstanding": 0.0, "totalInvoices": 0, "overdueCount": 0}
+
+    return compute
+
+
+async def _burst(requests):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        return await asyncio.gather(*(http.get(path) for path in requests))
+
+
+def test_identical_requests_share_one_computation(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "compute_dashboard_metrics", _slow_metrics(calls))
+
+    responses = asyncio.run(_burst(["/api/metrics"] * 20))
+
+    assert [r.status_code for r in responses] == [200] * 20
+    assert len(calls) == 1
+
+
+def test_waiting_requests_do_not_starve_other_routes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "compute_dashboard_metrics", _slow_metrics(calls, delay=1.0))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            # More waiters than the threadpool has threads
+            waiters = [asyncio.create_task(http.get("/api/metrics")) for _ in range(60)]
+            await asyncio.sleep(0.1)
+            started = time.monotonic()
+            response = await http.get("/api/clients")
+            elapsed = time.monotonic() - started
+            await asyncio.gather(*waiters)
+            return response, elapsed
+
+    response, elapsed = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert elapsed < 0.5
+
+
+def test_followers_beyond_the_cap_are_rejected(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "compute_dashboard_metrics", _slow_metrics(calls))
+    monkeypatch.setattr(coalescing.metrics._flight, "max_followers", 2)
+
+    responses = asyncio.run(_burst(["/api/metrics"] * 5))
+
+    statuses = sorted(r.status_code for r in responses)
+    assert statuses == [200, 200, 200, 429, 429]
+    assert all(r.headers["Retry-After"] for r in responses if r.status_code == 429)
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app import events, models
+
+
+class _Request:
+    async def is_disconnected(self):
+        return False
+
+
+async def _read(bus, last_event_id=None, count=2, before_read=None):
+    stream = bus.stream(_Request(), None, last_event_id)
+    chunks = [await stream.__anext__()]
+    if before_read:
+        await asyncio.sleep(0.1)
+        before_read()
+    for _ in range(count - 1):
+        chunks.append(await asyncio.wait_for(stream.__anext__(), 5))
+    await stream.aclose()
+    return chunks
+
+
+def test_events_reach_subscribers_of_another_worker():
+    publisher, subscriber = events.ChangeBus(), events.ChangeBus()
+
+    chunks = asyncio.run(_read(
+        subscriber, count=3,
+        before_read=lambda: [publisher.publish(None, "client.created", {"n": n}) for n in range(2)],
+    ))
+
+    assert chunks[1].startswith("id: 1\nevent: change\n")
+    assert '"n": 1' in chunks[2]
+
+
+def test_resume_replays_missed_events_after_restart():
+    events.ChangeBus().publish(None, "client.created", {"n": 0})
+    events.ChangeBus().publish(None, "client.created", {"n": 1})
+    events.ChangeBus().publish(None, "client.created", {"n": 2})
+
+    chunks = asyncio.run(_read(events.ChangeBus(), "1", count=3))
+
+    assert chunks[0] == "retry: 3000\n\n"
+    assert chunks[1].startswith("id: 2\n")
+    assert chunks[2].startswith("id: 3\n")
+
+
+def test_unknown_or_pruned_position_gets_reset(db):
+    bus = events.ChangeBus()
+    for n in range(3):
+        bus.publish(None, "client.created", {"n": n})
+    db.query(models.ChangeEvent).filter(models.ChangeEvent.id < 3).delete()
+    db.commit()
+
+    for last_event_id in ("old-epoch:1", "1", "99"):
+        chunks = asyncio.run(_read(bus, last_event_id))
+        assert chunks[1] == "id: 3\nevent: reset\ndata: {}\n\n"
+
+
+def test_old_events_are_pruned(db, monkeypatch):
+    monkeypatch.setattr(events, "PRUNE_EVERY", 1)
+    db.add(models.ChangeEvent(type="client.created", data="{}", createdAt=datetime.utcnow() - timedelta(days=1)))
+    db.commit()
+
+    events.ChangeBus().publish(None, "client.deleted", {"id": "c1"})
+
+    assert [e.type for e in db.query(models.ChangeEvent)] == ["client.deleted"]
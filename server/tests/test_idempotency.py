@@ -0,0 +1,123 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app import catalog, idempotency, main, models
+
+
+def _key():
+    return str(uuid.uuid4())
+
+
+def _invoice_body(client_id, unit_price=100.0):
+    return {
+        "clientId": client_id,
+        "issueDate": "2024-01-01T00:00:00",
+        "dueDate": "2030-01-01T00:00:00",
+        "items": [{"itemName": "Widget", "quantity": 1, "unitPrice": unit_price}],
+    }
+
+
+def test_retry_replays_the_first_response(client, make_client):
+    customer = make_client()
+    headers = {"Idempotency-Key": _key()}
+
+    first = client.post("/api/invoices", json=_invoice_body(customer["id"]), headers=headers)
+    second = client.post("/api/invoices", json=_invoice_body(customer["id"]), headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert len(client.get("/api/invoices").json()) == 1
+
+
+def test_key_reused_with_different_body_is_rejected(client, make_client):
+    customer = make_client()
+    headers = {"Idempotency-Key": _key()}
+    client.post("/api/invoices", json=_invoice_body(customer["id"]), headers=headers)
+
+    response = client.post("/api/invoices", json=_invoice_body(customer["id"], 5.0), headers=headers)
+
+    assert response.status_code == 422
+
+
+def test_csv_retry_with_new_multipart_boundary_is_replayed(client):
+    csv_body = b"name,email,address\nA,a@example.com,1 Main St\n"
+    headers = {"Idempotency-Key": _key()}
+    responses = [
+        client.post(
+            "/api/import/clients/csv",
+            files={"file": ("clients.csv", csv_body, "text/csv")},
+            headers={**headers, "Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+        for boundary in ("first-boundary-1234", "second-boundary-5678")
+    ]
+
+    assert [r.status_code for r in responses] == [200, 200]
+    assert responses[1].headers["Idempotent-Replayed"] == "true"
+    assert len(client.get("/api/clients").json()) == 1
+
+
+def test_failed_request_releases_the_key(client, db, make_client, monkeypatch):
+    customer = make_client()
+    key = _key()
+
+    def crash(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(catalog, "record_items", crash)
+    with pytest.raises(RuntimeError):
+        client.post("/api/invoices", json=_invoice_body(customer["id"]), headers={"Idempotency-Key": key})
+
+    assert db.query(models.IdempotencyKey).filter_by(key=key).first() is None
+
+
+def test_stale_claim_is_taken_over(client, db, make_client):
+    customer = make_client()
+    fresh, stale = _key(), _key()
+    lease = timedelta(seconds=idempotency.IDEMPOTENCY_LEASE_SECONDS)
+    db.add_all([
+        models.IdempotencyKey(key=fresh, fingerprint="x", createdAt=datetime.utcnow()),
+        models.IdempotencyKey(key=stale, fingerprint="x", createdAt=datetime.utcnow() - 2 * lease),
+    ])
+    db.commit()
+
+    in_flight = client.post("/api/invoices", json=_invoice_body(customer["id"]), headers={"Idempotency-Key": fresh})
+    taken_over = client.post("/api/invoices", json=_invoice_body(customer["id"]), headers={"Idempotency-Key": stale})
+
+    assert in_flight.status_code != 201
+    assert taken_over.status_code == 201
+    db.expire_all()
+    assert db.get(models.IdempotencyKey, fresh).fingerprint == "x"
+    assert db.get(models.IdempotencyKey, stale).statusCode == 201
+
+
+def test_running_request_keeps_its_claim_past_the_lease(client, make_client, monkeypatch):
+    customer = make_client()
+    record_items = catalog.record_items
+
+    def slow_record_items(db, invoice):
+        time.sleep(1.0)
+        return record_items(db, invoice)
+
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_LEASE_SECONDS", 0.3)
+    monkeypatch.setattr(catalog, "record_items", slow_record_items)
+    headers = {"Idempotency-Key": _key()}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            original = asyncio.create_task(http.post("/api/invoices", json=_invoice_body(customer["id"]), headers=headers))
+            await asyncio.sleep(0.7)
+            retry = await http.post("/api/invoices", json=_invoice_body(customer["id"]), headers=headers)
+            return await original, retry
+
+    original, retry = asyncio.run(scenario())
+
+    assert original.status_code == 201
+    assert retry.status_code == 409
+    assert len(client.get("/api/invoices").json()) == 1
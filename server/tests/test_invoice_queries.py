@@ -0,0 +1,61 @@
+from app import models
+
+
+def _add_payments(db, invoice_id, count):
+    db.add_all([models.Payment(invoiceId=invoice_id, amount=1.0) for _ in range(count)])
+    db.commit()
+
+
+def test_invoice_details_avoid_items_payments_cartesian_product(client, db, make_client, make_invoice, query_counter):
+    customer = make_client()
+    items = [{"itemName": f"Item {i}", "quantity": 1, "unitPrice": 10.0} for i in range(500)]
+    invoice = make_invoice(customer["id"], items=items)
+    _add_payments(db, invoice["id"], 200)
+
+    query_counter.count = 0
+    response = client.get(f"/api/invoices/{invoice['id']}")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["items"]) == 500
+    assert len(body["payments"]) == 200
+    assert query_counter.count <= 3
+
+
+def test_record_payment_statement_count_does_not_grow_with_history(client, db, make_client, make_invoice, query_counter):
+    customer = make_client()
+    small = make_invoice(customer["id"], items=[{"itemName": "A", "quantity": 1, "unitPrice": 1000.0}])
+    large = make_invoice(customer["id"], items=[
+        {"itemName": f"Item {i}", "quantity": 1, "unitPrice": 10.0} for i in range(500)
+    ])
+    _add_payments(db, large["id"], 200)
+
+    query_counter.count = 0
+    assert client.post(f"/api/invoices/{small['id']}/payments", json={"amount": 5.0}).status_code == 200
+    small_count = query_counter.count
+
+    query_counter.count = 0
+    response = client.post(f"/api/invoices/{large['id']}/payments", json={"amount": 5.0})
+    large_count = query_counter.count
+
+    assert response.status_code == 200
+    assert response.json()["amountPaid"] == 205.0
+    assert large_count == small_count
+
+
+def test_record_payment_rejects_overpayment(client, make_client, make_invoice):
+    invoice = make_invoice(make_client()["id"])
+
+    response = client.post(f"/api/invoices/{invoice['id']}/payments", json={"amount": 150.0})
+
+    assert response.status_code == 400
+
+
+def test_record_payment_marks_invoice_paid_when_settled(client, make_client, make_invoice):
+    invoice = make_invoice(make_client()["id"])
+
+    receipt = client.post(f"/api/invoices/{invoice['id']}/payments", json={"amount": 100.0}).json()
+
+    assert receipt["status"] == "PAID"
+    assert receipt["balanceDue"] == 0.0
+    assert client.get(f"/api/invoices/{invoice['id']}").json()["status"] == "PAID"
@@ -0,0 +1,85 @@
+import json
+import zlib
+from datetime import datetime
+
+from app import models
+
+
+def _statement(client, client_id, **params):
+    response = client.get(f"/api/clients/{client_id}/statement", params=params)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def _invoice(client, make_invoice, client_id, issue_date, total):
+    return make_invoice(
+        client_id,
+        items=[{"itemName": "Widget", "quantity": 1, "unitPrice": total}],
+        issue_date=issue_date,
+    )
+
+
+def test_running_balance_and_window(client, make_client, make_invoice):
+    customer = make_client()
+    first = _invoice(client, make_invoice, customer["id"], "2020-01-01T00:00:00", 100.0)
+    _invoice(client, make_invoice, customer["id"], "2020-03-01T00:00:00", 50.0)
+    _invoice(client, make_invoice, customer["id"], "2099-01-01T00:00:00", 25.0)
+    client.post(f"/api/invoices/{first['id']}/payments", json={"amount": 40.0})
+
+    lines = _statement(client, customer["id"])
+    assert [(line["kind"], line["balance"]) for line in lines[1:-1]] == [
+        ("INVOICE", 100.0), ("INVOICE", 150.0), ("PAYMENT", 110.0), ("INVOICE", 135.0)
+    ]
+    assert lines[-1]["closingBalance"] == 135.0
+
+    window = _statement(client, customer["id"], start="2020-02-01T00:00:00", end="2098-01-01T00:00:00")
+    assert window[0]["openingBalance"] == 100.0
+    assert [line["kind"] for line in window[1:-1]] == ["INVOICE", "PAYMENT"]
+    assert window[-1]["closingBalance"] == 110.0
+
+
+def test_date_only_end_covers_the_whole_day(client, make_client, make_invoice):
+    customer = make_client()
+    _invoice(client, make_invoice, customer["id"], "2020-03-01T15:00:00", 10.0)
+
+    whole_day = _statement(client, customer["id"], end="2020-03-01")
+    until_noon = _statement(client, customer["id"], end="2020-03-01T12:00:00")
+
+    assert [line["kind"] for line in whole_day[1:-1]] == ["INVOICE"]
+    assert until_noon[1:-1] == []
+
+
+def test_archived_invoices_and_payments_stay_on_statement(client, make_client, make_invoice):
+    customer = make_client()
+    invoice = _invoice(client, make_invoice, customer["id"], "2019-01-01T00:00:00", 100.0)
+    client.post(f"/api/invoices/{invoice['id']}/payments", json={"amount": 100.0})
+    _invoice(client, make_invoice, customer["id"], "2099-01-01T00:00:00", 30.0)
+    before = _statement(client, customer["id"])
+
+    assert client.post("/api/archive/run").json()["archived"] == 1
+
+    assert _statement(client, customer["id"]) == before
+    assert [line.get("reference") for line in before[1:-1]].count(invoice["invoiceNumber"]) == 2
+    window = _statement(client, customer["id"], start="2020-01-01T00:00:00")
+    assert window[0]["openingBalance"] == 100.0
+    assert client.get(f"/api/clients/{customer['id']}/statement", params={"format": "pdf"}).status_code == 200
+
+
+def test_archived_payments_backfilled_from_payloads(db, make_client):
+    from app import database
+
+    customer = make_client()
+    payload = {"payments": [{"id": "p1", "amount": 60.0, "paymentDate": "2019-02-01T00:00:00", "method": "Card"}]}
+    db.add(models.ArchivedInvoice(
+        id="inv-old", invoiceNumber="INV-OLD", clientId=customer["id"],
+        issueDate=datetime(2019, 1, 1), dueDate=datetime(2019, 2, 1), total=60.0,
+        payload=zlib.compress(json.dumps(payload).encode("utf-8")),
+    ))
+    db.commit()
+
+    table = models.ArchivedPayment.__table__
+    table.drop(bind=database.engine)
+    table.create(bind=database.engine)
+
+    payment = db.query(models.ArchivedPayment).one()
+    assert (payment.invoiceNumber, payment.amount, payment.clientId) == ("INV-OLD", 60.0, customer["id"])
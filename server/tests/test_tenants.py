@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+
+from app import database, models, tenants, versioning
+
+
+@pytest.fixture
+def multi_tenant(tmp_path, monkeypatch):
+    router = database.ShardRouter(f"sqlite:///{tmp_path}/{{tenant}}.db")
+    monkeypatch.setattr(database, "MULTI_TENANT", True)
+    monkeypatch.setattr(database, "shard_router", router)
+    monkeypatch.setattr(tenants, "_known", set())
+    models.ControlBase.metadata.drop_all(bind=database.engine)
+    tenants.ensure_registry()
+    for tenant_id in ("acme", "globex"):
+        tenants.provision(tenant_id, tenant_id.title())
+    return router
+
+
+def test_tenants_get_separate_data(client, multi_tenant):
+    acme = {"X-Tenant-ID": "acme"}
+    client.post("/api/clients", json={"name": "A", "email": "a@example.com", "address": "x"}, headers=acme)
+
+    assert len(client.get("/api/clients", headers=acme).json()) == 1
+    assert client.get("/api/clients", headers={"X-Tenant-ID": "globex"}).json() == []
+
+
+def test_tenant_is_required_and_validated(client, multi_tenant):
+    assert client.get("/api/clients").status_code == 400
+    assert client.get("/api/clients", headers={"X-Tenant-ID": "../etc"}).status_code == 400
+
+
+def test_unknown_tenant_gets_no_shard(client, multi_tenant, tmp_path):
+    for headers, params in (({"X-Tenant-ID": "acmee"}, None), ({}, {"tenant": "initech"})):
+        assert client.get("/api/clients", headers=headers, params=params).status_code == 404
+    response = client.post(
+        "/api/invoices", json={}, headers={"X-Tenant-ID": "initech", "Idempotency-Key": "k1"}
+    )
+
+    assert response.status_code == 404
+    assert sorted(multi_tenant._shards) == ["acme", "globex"]
+    assert sorted(p.name for p in tmp_path.glob("*.db")) == ["acme.db", "globex.db"]
+
+
+def test_provisioning_normalizes_the_id(multi_tenant):
+    assert tenants.provision(" Initech ", "Initech") == "initech"
+    assert tenants.is_registered("initech")
+    with pytest.raises(ValueError):
+        tenants.provision("../etc", "Nope")
+
+
+def test_tenant_query_parameter_for_browser_links(client, multi_tenant):
+    client.post("/api/clients", json={"name": "A", "email": "a@example.com", "address": "x"}, headers={"X-Tenant-ID": "acme"})
+
+    response = client.get("/api/export/invoices/csv", params={"tenant": "acme"})
+
+    assert response.status_code == 200
+    assert client.get("/api/clients", params={"tenant": "acme"}).json()[0]["name"] == "A"
+
+
+def test_opening_a_shard_does_not_block_open_tenants(multi_tenant, monkeypatch):
+    multi_tenant.get_sessionmaker("acme")
+    original = multi_tenant._create_engine
+
+    def slow_create_engine(tenant_id):
+        time.sleep(1.0)
+        return original(tenant_id)
+
+    monkeypatch.setattr(multi_tenant, "_create_engine", slow_create_engine)
+    opener = threading.Thread(target=multi_tenant.get_sessionmaker, args=("slowco",))
+    opener.start()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    multi_tenant.get_sessionmaker("acme")
+    elapsed = time.monotonic() - started
+    opener.join()
+
+    assert elapsed < 0.5
+    assert "slowco" in multi_tenant._shards
+
+
+def test_open_shards_are_bounded(tmp_path):
+    router = database.ShardRouter(f"sqlite:///{tmp_path}/{{tenant}}.db", max_open=2)
+    for tenant in ("a1", "b2", "c3"):
+        router.get_sessionmaker(tenant)
+
+    assert list(router._shards) == ["b2", "c3"]
+
+
+def test_schema_per_tenant_shards_get_their_own_version_row(tmp_path, monkeypatch):
+    # SQLite's attached databases stand in for the schemas of a shared server
+    shared = create_engine(f"sqlite:///{tmp_path}/shared.db")
+
+    @event.listens_for(shared, "connect")
+    def attach(dbapi_connection, connection_record):
+        for tenant_id in ("acme", "globex"):
+            dbapi_connection.execute(f"ATTACH DATABASE '{tmp_path}/{tenant_id}.db' AS \"{tenant_id}\"")
+
+    # The shared database's own tables must not receive the tenants' rows
+    models.Base.metadata.create_all(bind=shared)
+    router = database.ShardRouter(f"sqlite:///{tmp_path}/shared.db")
+    monkeypatch.setattr(
+        router, "_create_engine",
+        lambda tenant_id: shared.execution_options(schema_translate_map={None: tenant_id})
+    )
+
+    acme = router.get_sessionmaker("acme")()
+    globex = router.get_sessionmaker("globex")()
+    try:
+        acme.add(models.Client(name="A", email="a@example.com", address="x"))
+        acme.commit()
+
+        assert versioning.current_version(acme) == 1
+        assert versioning.current_version(globex) == 0
+        assert globex.query(models.DataVersion).count() == 1
+    finally:
+        acme.close()
+        globex.close()
+        shared.dispose()